@@ -1,17 +1,137 @@
 from django.contrib import admin
+from django.contrib.admin.widgets import AutocompleteSelect
+from django.core.paginator import Paginator
+from django.forms import BaseModelFormSet
+from django.http import StreamingHttpResponse
+from django.urls import reverse
 
+from .exporting import EXPORT_FORMATS
 from .models import Category, Comment, Location, Post
+from .search import filter_matching
 
 
-class PostInline(admin.StackedInline):
-    model = Post
-    extra = 0
+def export_response(queryset, export_format):
+    """Скачивание выбранных объектов без загрузки всей выборки в память."""
+    write_rows, content_type = EXPORT_FORMATS[export_format]
+    response = StreamingHttpResponse(
+        write_rows(queryset.order_by('pk')),
+        content_type=f'{content_type}; charset=utf-8',
+    )
+    filename = f'{queryset.model._meta.model_name}s.{export_format}'
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
 
 
-class CategoryAdmin(admin.ModelAdmin):
-    inlines = (
-        PostInline,
-    )
+@admin.action(description='Выгрузить выбранные в JSONL')
+def export_jsonl(modeladmin, request, queryset):
+    return export_response(queryset, 'jsonl')
+
+
+@admin.action(description='Выгрузить выбранные в CSV')
+def export_csv(modeladmin, request, queryset):
+    return export_response(queryset, 'csv')
+
+
+class FullTextSearchMixin:
+    """Поиск в списке объектов по полнотекстовому индексу.
+
+    Вместо LIKE '%слово%' по каждому полю из search_fields запрос уходит
+    в индекс FTS5; search_fields нужны только для показа строки поиска.
+    """
+
+    def get_search_results(self, request, queryset, search_term):
+        if not search_term.strip():
+            return queryset, False
+        return filter_matching(queryset, search_term), False
+
+
+class LoadedAutocompleteSelect(AutocompleteSelect):
+    """Автокомплит, который берёт выбранный объект из уже загруженного.
+
+    Обычный автокомплит ищет выбранный объект отдельным запросом, то есть
+    по запросу на строку списка.
+    """
+
+    selected_object = None
+
+    def optgroups(self, name, value, attr=None):
+        selected = self.selected_object
+        if selected is None or [str(v) for v in value if v] != [
+            str(selected.pk)
+        ]:
+            return super().optgroups(name, value, attr)
+        options = []
+        if not self.is_required:
+            options.append(self.create_option(name, '', '', False, 0))
+        options.append(self.create_option(
+            name, selected.pk, self.choices.field.label_from_instance(
+                selected
+            ), True, len(options),
+        ))
+        return [(None, options, 0)]
+
+
+class LoadedRelationsFormSet(BaseModelFormSet):
+    """Формы строк списка с выбранными объектами из list_select_related."""
+
+    def add_fields(self, form, index):
+        super().add_fields(form, index)
+        for name, field in form.fields.items():
+            widget = getattr(field.widget, 'widget', field.widget)
+            if not isinstance(widget, LoadedAutocompleteSelect):
+                continue
+            if form.instance._meta.get_field(name).is_cached(form.instance):
+                widget.selected_object = getattr(form.instance, name)
+
+
+class PostListingMixin:
+    """Постраничный список публикаций объекта на его странице в админке.
+
+    Заменяет встроенные формы публикаций: на странице популярной
+    категории их были бы тысячи. Загружаются только столбцы списка,
+    править публикацию можно по ссылке.
+    """
+
+    change_form_template = 'admin/blog/post_listing_change_form.html'
+    post_listing_field = None
+    post_listing_per_page = 50
+
+    def render_change_form(self, request, context, add=False, change=False,
+                           form_url='', obj=None):
+        if obj is not None:
+            context.update(self.get_post_listing(request, obj))
+        return super().render_change_form(request, context, add, change,
+                                          form_url, obj)
+
+    def get_post_listing(self, request, obj):
+        posts = Post.objects.filter(
+            **{self.post_listing_field: obj}
+        ).select_related('author').only(
+            'title', 'pub_date', 'is_published', 'author', 'author__username'
+        ).order_by('-pub_date', 'pk')
+        paginator = Paginator(posts, self.post_listing_per_page)
+        page = paginator.get_page(request.GET.get('posts_page'))
+        query = request.GET.copy()
+
+        def page_query(number):
+            query['posts_page'] = number
+            return query.urlencode()
+
+        return {
+            'post_page': page,
+            'post_previous_query': (page_query(page.previous_page_number())
+                                    if page.has_previous() else None),
+            'post_next_query': (page_query(page.next_page_number())
+                                if page.has_next() else None),
+            'post_changelist_url': '{}?{}__id__exact={}'.format(
+                reverse('admin:blog_post_changelist'),
+                self.post_listing_field, obj.pk,
+            ),
+        }
+
+
+class CategoryAdmin(PostListingMixin, admin.ModelAdmin):
+    post_listing_field = 'category'
     list_display = (
         'title',
         'is_published',
@@ -23,7 +143,8 @@ class CategoryAdmin(admin.ModelAdmin):
     search_fields = ('title',)
 
 
-class CommentAdmin(admin.ModelAdmin):
+class CommentAdmin(FullTextSearchMixin, admin.ModelAdmin):
+    actions = (export_jsonl, export_csv)
     list_display = (
         'short_text',
         'is_published',
@@ -34,10 +155,8 @@ class CommentAdmin(admin.ModelAdmin):
     search_fields = ('text',)
 
 
-class LocationAdmin(admin.ModelAdmin):
-    inlines = (
-        PostInline,
-    )
+class LocationAdmin(PostListingMixin, admin.ModelAdmin):
+    post_listing_field = 'location'
     list_display = (
         'name',
         'is_published',
@@ -45,10 +164,11 @@ class LocationAdmin(admin.ModelAdmin):
     list_editable = (
         'is_published',
     )
-    search_fields = ('title',)
+    search_fields = ('name',)
 
 
-class PostAdmin(admin.ModelAdmin):
+class PostAdmin(FullTextSearchMixin, admin.ModelAdmin):
+    actions = (export_jsonl, export_csv)
     list_display = (
         'title',
         'is_published',
@@ -62,12 +182,34 @@ class PostAdmin(admin.ModelAdmin):
         'category',
         'location',
     )
+    list_select_related = (
+        'author',
+        'category',
+        'location',
+    )
+    # <select> со всеми категориями и местами в каждой строке списка
+    # весил бы мегабайты.
+    autocomplete_fields = (
+        'category',
+        'location',
+    )
     search_fields = ('title',)
     list_filter = (
         'category',
         'location',
     )
 
+    def formfield_for_foreignkey(self, db_field, request, **kwargs):
+        if db_field.name in self.get_autocomplete_fields(request):
+            kwargs['widget'] = LoadedAutocompleteSelect(
+                db_field, self.admin_site, using=kwargs.get('using')
+            )
+        return super().formfield_for_foreignkey(db_field, request, **kwargs)
+
+    def get_changelist_formset(self, request, **kwargs):
+        kwargs.setdefault('formset', LoadedRelationsFormSet)
+        return super().get_changelist_formset(request, **kwargs)
+
 
 admin.site.register(Category, CategoryAdmin)
 admin.site.register(Comment, CommentAdmin)
@@ -1,7 +1,29 @@
 from django.apps import AppConfig
+from django.db.models.signals import post_migrate
 
 
 class BlogConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'blog'
     verbose_name = 'Блог'
+
+    def ready(self):
+        from . import holes, media, signals  # noqa: F401
+        post_migrate.connect(install_search_indexes, sender=self)
+
+
+def install_search_indexes(sender, using, **kwargs):
+    """Вернуть триггеры поиска, если миграция пересоздала таблицы.
+
+    SQLite меняет схему через копию таблицы, и триггеры старой таблицы
+    при этом пропадают.
+    """
+    from django.db import connections
+
+    from .models import Comment, Post
+    from .search import install_search_index
+
+    tables = connections[using].introspection.table_names()
+    for model in (Post, Comment):
+        if model._meta.db_table in tables:
+            install_search_index(model, using)
@@ -0,0 +1,102 @@
+import atexit
+import threading
+import time
+from collections import Counter
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import BigIntegerField, Case, F, Value, When
+
+from .models import Post
+
+
+VIEW_COUNT_KEY = 'blog:view_count:{}'
+
+
+def cache_view_counts(counts):
+    cache.set_many(
+        {VIEW_COUNT_KEY.format(pk): count for pk, count in counts.items()},
+        timeout=None,
+    )
+
+
+def get_view_counts(post_ids):
+    """Число просмотров постов: {pk: число} из кэша, недостающие — из БД."""
+    keys = {VIEW_COUNT_KEY.format(pk): pk for pk in post_ids}
+    counts = {keys[key]: count for key, count in cache.get_many(keys).items()}
+    missing = set(post_ids) - counts.keys()
+    if missing:
+        loaded = dict(Post.objects.filter(pk__in=missing).values_list(
+            'pk', 'view_count'
+        ))
+        cache_view_counts(loaded)
+        counts.update(loaded)
+    return counts
+
+
+class ViewCounterBuffer:
+    """Копит просмотры публикаций в памяти процесса.
+
+    Вместо записи в БД на каждый просмотр накопленные приращения
+    сбрасываются одним UPDATE ... CASE раз в VIEW_COUNT_FLUSH_INTERVAL
+    секунд или после VIEW_COUNT_FLUSH_HITS просмотров, а также при
+    завершении процесса.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counts = Counter()
+        self._hits = 0
+        self._flushed_at = time.monotonic()
+
+    def add(self, post_id):
+        with self._lock:
+            self._counts[post_id] += 1
+            self._hits += 1
+            due = (
+                self._hits >= settings.VIEW_COUNT_FLUSH_HITS
+                or time.monotonic() - self._flushed_at
+                >= settings.VIEW_COUNT_FLUSH_INTERVAL
+            )
+        if due:
+            self.flush()
+
+    def take_pending(self):
+        """Забрать накопленные приращения, очистив буфер."""
+        with self._lock:
+            counts, self._counts = self._counts, Counter()
+            self._hits = 0
+            self._flushed_at = time.monotonic()
+        return counts
+
+    def flush(self):
+        counts = self.take_pending()
+        if not counts:
+            return 0
+        increment = Case(
+            *(When(pk=pk, then=Value(count))
+              for pk, count in counts.items()),
+            output_field=BigIntegerField(),
+        )
+        posts = Post.objects.filter(pk__in=counts)
+        updated = posts.update(view_count=F('view_count') + increment)
+        # Версии карточек не меняются: число просмотров выводится «дыркой»
+        # post_views из кэша, а кэш страниц и карточек остаётся в силе.
+        cache_view_counts(dict(posts.values_list('pk', 'view_count')))
+        return updated
+
+
+view_counter = ViewCounterBuffer()
+atexit.register(view_counter.flush)
+
+
+def count_post_view(view):
+    """Засчитать просмотр поста, даже если страница пришла из кэша."""
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        response = view(request, *args, **kwargs)
+        if request.method == 'GET' and response.status_code in (200, 304):
+            view_counter.add(kwargs['post_pk'])
+        return response
+    return wrapper
@@ -0,0 +1,87 @@
+import csv
+import json
+from datetime import date, time
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.utils.encoding import is_protected_type
+
+from .models import Category, Comment, Location, Post
+
+EXPORT_MODELS = (Category, Location, Post, Comment)
+
+CHUNK_SIZE = 2000
+
+
+class Echo:
+    """Файлоподобный объект для csv.writer: возвращает строку, а не пишет."""
+
+    def write(self, value):
+        return value
+
+
+def get_export_query(model, since=None):
+    """Выборка для выгрузки в порядке первичного ключа."""
+    queryset = model._base_manager.order_by('pk')
+    if since is not None:
+        queryset = queryset.filter(created_at__gte=since)
+    return queryset
+
+
+def export_fields(model):
+    return [field for field in model._meta.concrete_fields
+            if not field.primary_key]
+
+
+def field_value(obj, field):
+    """Значение поля так же, как его сериализует dumpdata."""
+    if field.many_to_one:
+        return getattr(obj, field.attname)
+    value = field.value_from_object(obj)
+    if is_protected_type(value):
+        return value
+    return field.value_to_string(obj)
+
+
+def to_json_line(obj, fields, many_to_many=None):
+    """Объект строкой JSONL в формате фикстур Django.
+
+    many_to_many — уже известные связи {имя поля: [pk, ...]}.
+    """
+    record = {
+        'model': obj._meta.label_lower,
+        'pk': obj.pk,
+        'fields': {field.name: field_value(obj, field) for field in fields},
+    }
+    if many_to_many:
+        record['fields'].update(many_to_many)
+    line = json.dumps(record, cls=DjangoJSONEncoder, ensure_ascii=False)
+    return line + '\n'
+
+
+def iter_jsonl(queryset, chunk_size=CHUNK_SIZE):
+    """Строки JSONL в формате фикстур Django, по одной на объект."""
+    fields = export_fields(queryset.model)
+    for obj in queryset.iterator(chunk_size=chunk_size):
+        yield to_json_line(obj, fields)
+
+
+def iter_csv(queryset, chunk_size=CHUNK_SIZE):
+    """Строки CSV: заголовок и по строке на объект."""
+    fields = export_fields(queryset.model)
+    writer = csv.writer(Echo())
+    yield writer.writerow(['pk', *(field.name for field in fields)])
+    encoder = DjangoJSONEncoder()
+    for obj in queryset.iterator(chunk_size=chunk_size):
+        row = [obj.pk]
+        for field in fields:
+            value = field_value(obj, field)
+            if isinstance(value, (date, time)):
+                value = encoder.default(value)
+            row.append(value)
+        yield writer.writerow(row)
+
+
+EXPORT_FORMATS = {
+    'jsonl': (iter_jsonl, 'application/x-ndjson'),
+    'csv': (iter_csv, 'text/csv'),
+}
@@ -0,0 +1,70 @@
+from django.core.files.storage import default_storage
+from django.template.loader import render_to_string
+
+from core.page_cache import register_hole
+
+from .counters import get_view_counts
+from .forms import CommentForm
+
+
+@register_hole('comment_form')
+def render_comment_form(request, post_id):
+    if not request.user.is_authenticated:
+        return ''
+    return render_to_string(
+        'includes/comment_form.html',
+        {'post_id': post_id, 'form': CommentForm()},
+        request=request,
+    )
+
+
+@register_hole('post_views')
+def render_post_views(request, post_id):
+    """Число просмотров: меняется слишком часто для кэша страниц и карточек.
+
+    Счётчики всех постов страницы читаются одним запросом к кэшу.
+    """
+    counts = getattr(request, 'view_counts', {})
+    if post_id not in counts:
+        post_ids = {post_id} | {
+            hole['kwargs']['post_id']
+            for hole in getattr(request, 'page_holes', ())
+            if hole['name'] == 'post_views'
+        }
+        counts.update(get_view_counts(post_ids))
+        counts.setdefault(post_id, 0)
+        request.view_counts = counts
+    return str(counts[post_id])
+
+
+@register_hole('post_controls')
+def render_post_controls(request, post_id, author_id, image=''):
+    if request.user.pk != author_id:
+        return ''
+    return render_to_string(
+        'includes/post_controls.html',
+        {
+            'post_id': post_id,
+            # Оригинал фото с метаданными виден только автору.
+            'original_url': default_storage.url(image) if image else '',
+        },
+        request=request,
+    )
+
+
+@register_hole('comment_controls')
+def render_comment_controls(request, post_id, comment_id, author_id):
+    if request.user.pk != author_id:
+        return ''
+    return render_to_string(
+        'includes/comment_controls.html',
+        {'post_id': post_id, 'comment_id': comment_id},
+        request=request,
+    )
+
+
+@register_hole('profile_controls')
+def render_profile_controls(request, profile_id):
+    if request.user.pk != profile_id:
+        return ''
+    return render_to_string('includes/profile_controls.html', request=request)
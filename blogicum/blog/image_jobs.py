@@ -0,0 +1,158 @@
+import os
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from datetime import timedelta
+
+import django
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .images import make_thumbnails
+from .models import ImageJob, Post
+from .versioning import bump_card_version
+
+
+def claim_image_jobs(limit):
+    """Взять в работу до limit задач, включая зависшие дольше таймаута.
+
+    Задача считается своей, только если условный UPDATE её действительно
+    пометил, поэтому несколько обработчиков не берут одну и ту же задачу.
+    Зависшие задачи, у которых не осталось попыток, завершаются ошибкой.
+    """
+    now = timezone.now()
+    available = Q(started_at__isnull=True) | Q(
+        started_at__lt=now - timedelta(seconds=settings.IMAGE_JOB_TIMEOUT)
+    )
+    claimed = []
+    with transaction.atomic():
+        jobs = ImageJob.objects.select_for_update(skip_locked=True).filter(
+            available
+        )[:limit]
+        for job in jobs:
+            taken = ImageJob.objects.filter(
+                available, pk=job.pk, started_at=job.started_at
+            ).update(started_at=now, attempts=F('attempts') + 1)
+            if not taken:
+                continue
+            job.started_at = now
+            if job.attempts >= settings.IMAGE_JOB_ATTEMPTS:
+                fail_image_job(job, TimeoutError('обработка не завершилась'))
+            else:
+                job.attempts += 1
+                claimed.append(job)
+    return claimed
+
+
+def finish_image_job(job, variants):
+    """Сохранить размеры копий, если фото не успели заменить."""
+    updated = Post.objects.filter(pk=job.post_id, image=job.image).update(
+        image_variants=variants
+    )
+    if updated:
+        bump_card_version('post', job.post_id)
+    job.delete()
+
+
+def fail_image_job(job, error):
+    """Запомнить ошибку; после последней попытки убрать заглушку.
+
+    Оригинал с метаданными публично не выводится, поэтому у поста без
+    готовых копий фото просто не показывается.
+    """
+    job.error = f'{type(error).__name__}: {error}'
+    job.save(update_fields=('error',))
+    if job.attempts < settings.IMAGE_JOB_ATTEMPTS:
+        return
+    post = Post.objects.filter(pk=job.post_id, image=job.image).only(
+        'image_variants'
+    ).first()
+    if post is None:
+        job.delete()
+    else:
+        finish_image_job(job, {**post.image_variants, 'widths': []})
+
+
+class ImageWorker:
+    """Обработчик очереди фото.
+
+    Уменьшенные копии считаются в пуле процессов, а база данных
+    используется только из основного процесса. С workers=0 задачи
+    выполняются в текущем процессе.
+    """
+
+    def __init__(self, workers=None, batch_size=None):
+        if workers is None:
+            workers = os.cpu_count() or 1
+        self.workers = workers
+        self.executor = None
+        if workers:
+            self.start()
+        self.batch_size = batch_size or max(workers, 1) * 2
+
+    def start(self):
+        self.executor = ProcessPoolExecutor(
+            max_workers=self.workers, initializer=django.setup
+        )
+
+    def restart(self):
+        """Заменить пул, в котором упал один из процессов."""
+        self.executor.shutdown(wait=False)
+        self.start()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        if self.executor is not None:
+            self.executor.shutdown()
+
+    def run_once(self):
+        """Обработать одну пачку задач; вернуть число обработанных."""
+        jobs = claim_image_jobs(self.batch_size)
+        if self.executor is None:
+            results = [self.call(make_thumbnails, job.image) for job in jobs]
+        else:
+            results = self.run_in_pool(jobs)
+        for job, (variants, error) in zip(jobs, results):
+            if error is None:
+                finish_image_job(job, variants)
+            else:
+                fail_image_job(job, error)
+        return len(jobs)
+
+    def run_in_pool(self, jobs):
+        """Посчитать копии в пуле процессов.
+
+        Если процесс пула упал (нехватка памяти, сбой кодека), ошибку
+        получают все задачи пачки, а пул становится непригодным. Пул
+        пересоздаётся, а эти задачи повторяются по одной, так что попытку
+        теряет только задача, на которой процесс падает.
+        """
+        futures = [self.submit(job) for job in jobs]
+        results = [self.call(future.result) for future in futures]
+        broken = [index for index, (_, error) in enumerate(results)
+                  if isinstance(error, BrokenProcessPool)]
+        if broken:
+            self.restart()
+        for index in broken:
+            results[index] = self.call(self.submit(jobs[index]).result)
+            if isinstance(results[index][1], BrokenProcessPool):
+                self.restart()
+        return results
+
+    def submit(self, job):
+        try:
+            return self.executor.submit(make_thumbnails, job.image)
+        except BrokenProcessPool as error:
+            future = Future()
+            future.set_exception(error)
+            return future
+
+    @staticmethod
+    def call(func, *args):
+        try:
+            return func(*args), None
+        except Exception as error:
+            return None, error
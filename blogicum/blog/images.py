@@ -0,0 +1,167 @@
+import hashlib
+import os
+import re
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from PIL import Image, ImageOps
+
+try:
+    # Кодировщик AVIF для Pillow, собранного без libavif.
+    import pillow_avif  # noqa: F401
+except ImportError:
+    pass
+
+DIGEST_LENGTH = 12
+
+# Имя копии из variant_name() с хэшем: photo.<digest>.640w.webp.
+VARIANT_NAME_RE = re.compile(
+    rf'\.[0-9a-f]{{{DIGEST_LENGTH}}}\.\d+w\.[a-z]+$'
+)
+
+ORIENTATION_TAG = 0x0112
+
+# Значения EXIF Orientation, при которых фото повёрнуто на 90°.
+ROTATED = {5, 6, 7, 8}
+
+# Современные форматы в порядке предпочтения для <picture>.
+MODERN_FORMATS = ('avif', 'webp')
+
+MIME_TYPES = {
+    'avif': 'image/avif',
+    'webp': 'image/webp',
+    'jpg': 'image/jpeg',
+    'png': 'image/png',
+}
+
+ENCODE_OPTIONS = {
+    'avif': {'format': 'AVIF', 'quality': 60},
+    'webp': {'format': 'WEBP', 'quality': 80, 'method': 4},
+    'jpg': {'format': 'JPEG', 'quality': 85, 'optimize': True,
+            'progressive': True},
+    'png': {'format': 'PNG', 'optimize': True},
+}
+
+
+def variant_name(name, width, ext=None, digest=None):
+    """Имя копии рядом с оригиналом: photo.jpg → photo.<digest>.640w.webp.
+
+    digest меняется вместе с содержимым копий, поэтому их можно кэшировать
+    навсегда.
+    """
+    root, original_ext = os.path.splitext(name)
+    if digest:
+        root = f'{root}.{digest}'
+    return f'{root}.{width}w' + (f'.{ext}' if ext else original_ext)
+
+
+def variants_digest(data, formats):
+    """Хэш оригинала и параметров обработки для имён копий."""
+    params = (settings.POST_IMAGE_MAX_SIZE,
+              sorted(settings.POST_IMAGE_WIDTHS), formats, ENCODE_OPTIONS)
+    digest = hashlib.md5(data)
+    digest.update(repr(params).encode())
+    return digest.hexdigest()[:DIGEST_LENGTH]
+
+
+def available_formats():
+    """Современные форматы, для которых в Pillow есть кодировщик."""
+    Image.init()
+    return [ext for ext in MODERN_FORMATS
+            if ENCODE_OPTIONS[ext]['format'] in Image.SAVE]
+
+
+def resize(image, width):
+    height = max(round(image.height * width / image.width), 1)
+    return image.resize((width, height), Image.LANCZOS)
+
+
+def encode(image, ext, icc_profile=None):
+    """Закодировать картинку без EXIF, XMP и прочих метаданных."""
+    if ext == 'jpg' and image.mode not in ('RGB', 'L'):
+        image = image.convert('RGB')
+    options = dict(ENCODE_OPTIONS[ext])
+    if icc_profile:
+        options['icc_profile'] = icc_profile
+    buffer = BytesIO()
+    image.save(buffer, **options)
+    return ContentFile(buffer.getvalue())
+
+
+def read_size(field_file):
+    """Размеры фото по заголовку файла, без декодирования; {} при ошибке."""
+    if not field_file:
+        return {}
+    try:
+        with field_file.storage.open(field_file.name, 'rb') as source:
+            with Image.open(source) as image:
+                width, height = image.size
+                if image.getexif().get(ORIENTATION_TAG) in ROTATED:
+                    width, height = height, width
+    except (OSError, ValueError, Image.DecompressionBombError):
+        return {}
+    return {'width': width, 'height': height}
+
+
+def open_upload(data):
+    """Оригинал, повёрнутый по EXIF и уменьшенный до POST_IMAGE_MAX_SIZE."""
+    image = Image.open(BytesIO(data))
+    image.load()
+    icc_profile = image.info.get('icc_profile')
+    image = ImageOps.exif_transpose(image)
+    if image.mode not in ('RGB', 'RGBA', 'L', 'LA'):
+        transparent = image.mode == 'PA' or 'transparency' in image.info
+        image = image.convert('RGBA' if transparent else 'RGB')
+    image.info = {}
+    max_size = settings.POST_IMAGE_MAX_SIZE
+    image.thumbnail((max_size, max_size), Image.LANCZOS)
+    return image, icc_profile
+
+
+def make_thumbnails(name, storage=default_storage):
+    """Подготовить копии фото для показа на сайте.
+
+    Для каждой ширины из POST_IMAGE_WIDTHS меньше оригинала и для самого
+    оригинала, уменьшенного до POST_IMAGE_MAX_SIZE, сохраняются JPEG
+    (PNG для картинок с прозрачностью), WebP и, если есть кодировщик,
+    AVIF — без метаданных. Выполняется в процессах обработчика
+    process_images, а не в веб-запросе.
+    """
+    with storage.open(name, 'rb') as source:
+        data = source.read()
+    image, icc_profile = open_upload(data)
+    fallback = 'png' if 'A' in image.getbands() else 'jpg'
+    formats = available_formats()
+    digest = variants_digest(data, formats)
+    widths = [width for width in sorted(settings.POST_IMAGE_WIDTHS)
+              if width < image.width]
+    widths.append(image.width)
+    for width in widths:
+        resized = image if width == image.width else resize(image, width)
+        for ext in (*formats, fallback):
+            variant = variant_name(name, width, ext, digest)
+            if storage.exists(variant):
+                storage.delete(variant)
+            storage.save(variant, encode(resized, ext, icc_profile))
+    return {
+        'width': image.width,
+        'height': image.height,
+        'widths': widths,
+        'fallback': fallback,
+        'formats': formats,
+        'digest': digest,
+    }
+
+
+def get_srcset(field_file, variants, ext=None):
+    """srcset из копий фото в формате ext (по умолчанию — запасном)."""
+    storage = field_file.storage
+    ext = ext or variants.get('fallback')
+    digest = variants.get('digest')
+    return ', '.join(
+        f'{storage.url(variant_name(field_file.name, width, ext, digest))}'
+        f' {width}w'
+        for width in variants['widths']
+    )
@@ -0,0 +1,353 @@
+import json
+import tempfile
+import time
+from contextlib import contextmanager
+
+from django.core.management.color import no_style
+from django.core.serializers.python import Deserializer
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+from django.utils import timezone
+
+from .exporting import export_fields, to_json_line
+from .models import Category, Comment, ImageJob, Location, Post, User
+from .utils import recount_comment_count
+from .versioning import bump_card_version, bump_feed_version
+
+IMPORT_MODELS = (User, Category, Location, Post, Comment)
+
+READ_SIZE = 1 << 16
+
+SEPARATORS = ' \t\r\n,'
+
+
+def iter_json_lines(stream):
+    """Объекты фикстуры в формате JSONL: по одному на строку."""
+    for line in stream:
+        line = line.strip()
+        if line:
+            yield json.loads(line)
+
+
+def skip_separators(stream, buffer, pos, read_size):
+    """Позиция следующего значащего символа, дочитывая поток.
+
+    Возвращает (buffer, pos); pos равен None, если поток закончился.
+    """
+    while True:
+        while pos < len(buffer) and buffer[pos] in SEPARATORS:
+            pos += 1
+        if pos < len(buffer):
+            return buffer, pos
+        buffer, pos = stream.read(read_size), 0
+        if not buffer:
+            return buffer, None
+
+
+def decode_object(decoder, stream, buffer, pos, read_size):
+    """Разобрать объект с позиции pos; вернуть (obj, buffer, pos)."""
+    while True:
+        try:
+            obj, pos = decoder.raw_decode(buffer, pos)
+        except json.JSONDecodeError:
+            # Объект не поместился в буфер: дочитываем не меньше, чем уже
+            # накоплено, чтобы крупные объекты не разбирались заново
+            # на каждом куске.
+            chunk = stream.read(max(read_size, len(buffer) - pos))
+            if not chunk:
+                raise
+            buffer, pos = buffer[pos:] + chunk, 0
+        else:
+            return obj, buffer, pos
+
+
+def iter_json_array(stream, read_size=READ_SIZE):
+    """Объекты JSON-массива, прочитанные из потока кусками.
+
+    В памяти держится только недочитанный хвост, а не весь файл.
+    """
+    decoder = json.JSONDecoder()
+    buffer, pos = skip_separators(stream, '', 0, read_size)
+    if pos is None:
+        return
+    if buffer[pos] != '[':
+        raise json.JSONDecodeError('Ожидался JSON-массив', buffer, pos)
+    pos += 1
+    while True:
+        buffer, pos = skip_separators(stream, buffer, pos, read_size)
+        if pos is None:
+            raise json.JSONDecodeError('Неожиданный конец файла', buffer, 0)
+        if buffer[pos] == ']':
+            return
+        obj, buffer, pos = decode_object(
+            decoder, stream, buffer, pos, read_size
+        )
+        yield obj
+
+
+@contextmanager
+def keep_fixture_dates(model):
+    """Не подменять auto_now/auto_now_add-даты из фикстуры текущим временем.
+
+    bulk_create, в отличие от loaddata, вызывает pre_save полей.
+    """
+    fields = [
+        field for field in model._meta.concrete_fields
+        if getattr(field, 'auto_now', False)
+        or getattr(field, 'auto_now_add', False)
+    ]
+    saved = [(field.auto_now, field.auto_now_add) for field in fields]
+    for field in fields:
+        field.auto_now = field.auto_now_add = False
+    try:
+        yield fields
+    finally:
+        for field, (auto_now, auto_now_add) in zip(fields, saved):
+            field.auto_now, field.auto_now_add = auto_now, auto_now_add
+
+
+class ImportStats:
+    """Счётчики импорта по одной модели."""
+
+    def __init__(self, label):
+        self.label = label
+        self.created = 0
+        self.skipped = 0
+        self.links_skipped = 0
+        self.elapsed = 0.0
+
+    @property
+    def rate(self):
+        return self.created / self.elapsed if self.elapsed else 0.0
+
+
+class FixtureImporter:
+    """Потоковая загрузка фикстур пользователей, категорий, мест,
+    публикаций и комментариев.
+
+    Объекты копятся пачками по batch_size и вставляются через bulk_create
+    в отдельной транзакции на пачку. Внешние ключи пачки проверяются одним
+    запросом на поле; строки, ссылающиеся на ещё не загруженные объекты,
+    откладываются до конца файла (dumpdata выгружает модели в порядке
+    приложений, а не зависимостей). Отложенные строки пишутся во
+    временный файл на диске, а не копятся в памяти. Если ссылка так и не
+    нашлась, необязательная обнуляется, а строка с обязательной
+    пропускается. Связи многие-ко-многим записываются после вставки
+    пачки. Объекты других моделей пропускаются.
+    """
+
+    def __init__(self, batch_size=500, using=DEFAULT_DB_ALIAS,
+                 progress=None):
+        self.batch_size = batch_size
+        self.using = using
+        self.progress = progress
+        self.models = {model._meta.label_lower: model
+                       for model in IMPORT_MODELS}
+        self.stats = {}
+        self.ignored = 0
+        self._batch = []
+        self._model = None
+        self._deferred = {}
+
+    def run(self, records):
+        try:
+            self.load(self._known(records))
+            for model in IMPORT_MODELS:
+                deferred = self._deferred.pop(model, None)
+                if deferred is None:
+                    continue
+                with deferred:
+                    deferred.seek(0)
+                    self.load(iter_json_lines(deferred), final=True)
+        finally:
+            for deferred in self._deferred.values():
+                deferred.close()
+        self.reset_sequences()
+        return list(self.stats.values())
+
+    def load(self, records, final=False):
+        objects = Deserializer(
+            records, using=self.using, ignorenonexistent=True
+        )
+        for deserialized in objects:
+            obj = deserialized.object
+            obj._fixture_m2m = deserialized.m2m_data or {}
+            if type(obj) is not self._model:
+                self.flush(final)
+                self._model = type(obj)
+            self._batch.append(obj)
+            if len(self._batch) >= self.batch_size:
+                self.flush(final)
+        self.flush(final)
+
+    def _known(self, records):
+        for record in records:
+            if record.get('model', '').lower() in self.models:
+                yield record
+            else:
+                self.ignored += 1
+
+    def flush(self, final=False):
+        if not self._batch:
+            return
+        model, batch = self._model, self._batch
+        self._batch = []
+        label = model._meta.label_lower
+        stats = self.stats.setdefault(label, ImportStats(label))
+        started = time.monotonic()
+        with transaction.atomic(using=self.using):
+            objs, deferred = self.resolve_foreign_keys(model, batch)
+            if final:
+                objs.extend(self.drop_missing_keys(model, deferred))
+            else:
+                self.defer(model, deferred)
+            with keep_fixture_dates(model) as date_fields:
+                self.prepare(model, objs, date_fields)
+                model._base_manager.using(self.using).bulk_create(
+                    objs, batch_size=self.batch_size
+                )
+            stats.links_skipped += self.set_many_to_many(model, objs)
+            self.after_insert(model, objs)
+        stats.created += len(objs)
+        if final:
+            stats.skipped += len(batch) - len(objs)
+        stats.elapsed += time.monotonic() - started
+        if self.progress is not None:
+            self.progress(stats)
+
+    def defer(self, model, objs):
+        """Отложить строки до конца файла во временный файл модели."""
+        if not objs:
+            return
+        if model not in self._deferred:
+            self._deferred[model] = tempfile.TemporaryFile(
+                'w+', encoding='utf-8'
+            )
+        fields = export_fields(model)
+        self._deferred[model].writelines(
+            to_json_line(obj, fields, obj._fixture_m2m) for obj in objs
+        )
+
+    def missing_keys(self, model, objs):
+        """Ссылки пачки на отсутствующие в БД объекты, по полям."""
+        missing = {}
+        for field in model._meta.concrete_fields:
+            if not field.many_to_one:
+                continue
+            ids = {getattr(obj, field.attname) for obj in objs}
+            ids.discard(None)
+            if not ids:
+                continue
+            ids.difference_update(
+                field.related_model._base_manager.using(self.using).filter(
+                    pk__in=ids
+                ).values_list('pk', flat=True)
+            )
+            if ids:
+                missing[field] = ids
+        return missing
+
+    def resolve_foreign_keys(self, model, objs):
+        """Разделить пачку на готовые к вставке и отложенные строки."""
+        missing = self.missing_keys(model, objs)
+        if not missing:
+            return objs, []
+        ready, deferred = [], []
+        for obj in objs:
+            if any(getattr(obj, field.attname) in ids
+                   for field, ids in missing.items()):
+                deferred.append(obj)
+            else:
+                ready.append(obj)
+        return ready, deferred
+
+    def drop_missing_keys(self, model, objs):
+        """Обнулить ненайденные необязательные ссылки, остальное отбросить."""
+        missing = self.missing_keys(model, objs)
+        kept = []
+        for obj in objs:
+            for field, ids in missing.items():
+                if getattr(obj, field.attname) not in ids:
+                    continue
+                if not field.null:
+                    break
+                setattr(obj, field.attname, None)
+            else:
+                kept.append(obj)
+        return kept
+
+    def prepare(self, model, objs, date_fields):
+        now = timezone.now()
+        if model is Post:
+            published_categories = set(
+                Category.objects.using(self.using).filter(
+                    pk__in={obj.category_id for obj in objs},
+                    is_published=True,
+                ).values_list('pk', flat=True)
+            )
+        for obj in objs:
+            for field in date_fields:
+                if getattr(obj, field.attname) is None:
+                    setattr(obj, field.attname, now)
+            if model is Post:
+                obj.render_text()
+                obj.is_visible = bool(
+                    obj.is_published
+                    and obj.category_id in published_categories
+                    and obj.pub_date <= now
+                )
+
+    def set_many_to_many(self, model, objs):
+        """Сохранить связи многие-ко-многим (группы и права пользователей).
+
+        bulk_create их не записывает. Связи с отсутствующими в БД
+        объектами и у строк без первичного ключа (его bulk_create
+        возвращает не во всех СУБД) пропускаются; возвращает их число.
+        """
+        skipped = 0
+        for field in model._meta.many_to_many:
+            links = [(obj.pk, pk) for obj in objs
+                     for pk in obj._fixture_m2m.get(field.name, ())]
+            if not links:
+                continue
+            existing = set(
+                field.related_model._base_manager.using(self.using).filter(
+                    pk__in={pk for _, pk in links}
+                ).values_list('pk', flat=True)
+            )
+            through = field.remote_field.through
+            source = f'{field.m2m_field_name()}_id'
+            target = f'{field.m2m_reverse_field_name()}_id'
+            rows = [through(**{source: obj_pk, target: pk})
+                    for obj_pk, pk in links
+                    if obj_pk is not None and pk in existing]
+            skipped += len(links) - len(rows)
+            through._base_manager.using(self.using).bulk_create(
+                rows, batch_size=self.batch_size, ignore_conflicts=True
+            )
+        return skipped
+
+    def after_insert(self, model, objs):
+        """Досчитать то, что при обычном save делают модель и сигналы."""
+        if model is Post:
+            if any(obj.is_visible for obj in objs):
+                bump_feed_version()
+            ImageJob.objects.using(self.using).bulk_create(
+                ImageJob(post_id=obj.pk, image=obj.image.name)
+                for obj in objs
+                if obj.pk is not None and obj.image
+                and 'widths' not in obj.image_variants
+            )
+        elif model is Comment:
+            post_ids = {obj.post_id for obj in objs}
+            recount_comment_count(Post.objects.filter(pk__in=post_ids))
+            for pk in post_ids:
+                bump_card_version('post', pk)
+
+    def reset_sequences(self):
+        models = [self.models[label] for label in self.stats]
+        connection = connections[self.using]
+        statements = connection.ops.sequence_reset_sql(no_style(), models)
+        if statements:
+            with connection.cursor() as cursor:
+                for sql in statements:
+                    cursor.execute(sql)
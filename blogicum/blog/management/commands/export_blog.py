@@ -0,0 +1,89 @@
+from contextlib import ExitStack
+from functools import partial
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+
+from blog.exporting import (CHUNK_SIZE, EXPORT_FORMATS, EXPORT_MODELS,
+                            get_export_query)
+
+
+class Command(BaseCommand):
+    help = ('Потоково выгружает категории, места, публикации и комментарии '
+            'в JSONL или CSV.')
+
+    def add_arguments(self, parser):
+        labels = [model._meta.label_lower for model in EXPORT_MODELS]
+        parser.add_argument(
+            'models',
+            nargs='*',
+            metavar='model',
+            help=f'Модели для выгрузки: {", ".join(labels)}; '
+                 'по умолчанию все.',
+        )
+        parser.add_argument(
+            '--format',
+            choices=tuple(EXPORT_FORMATS),
+            default='jsonl',
+            help='Формат выгрузки; CSV — только для одной модели.',
+        )
+        parser.add_argument(
+            '-o', '--output',
+            help='Файл для записи; по умолчанию stdout.',
+        )
+        parser.add_argument(
+            '--since',
+            help=('Выгрузить только объекты, добавленные не раньше '
+                  'этой даты или даты и времени (ISO 8601).'),
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=CHUNK_SIZE,
+            help='Сколько строк читать из БД за раз.',
+        )
+
+    def handle(self, *args, **options):
+        labels = options['models'] or [
+            model._meta.label_lower for model in EXPORT_MODELS
+        ]
+        known = {model._meta.label_lower: model for model in EXPORT_MODELS}
+        unknown = set(labels) - set(known)
+        if unknown:
+            raise CommandError(
+                f'Неизвестные модели: {", ".join(sorted(unknown))}'
+            )
+        models = [model for label, model in known.items() if label in labels]
+        if options['format'] == 'csv' and len(models) > 1:
+            raise CommandError('В CSV можно выгрузить только одну модель.')
+        if options['chunk_size'] < 1:
+            raise CommandError('--chunk-size должен быть положительным.')
+        since = self.parse_since(options['since'])
+        write_rows = EXPORT_FORMATS[options['format']][0]
+        with ExitStack() as stack:
+            if options['output']:
+                write = stack.enter_context(open(
+                    options['output'], 'w', encoding='utf-8', newline=''
+                )).write
+            else:
+                write = partial(self.stdout.write, ending='')
+            for model in models:
+                for line in write_rows(get_export_query(model, since),
+                                       options['chunk_size']):
+                    write(line)
+
+    def parse_since(self, value):
+        if value is None:
+            return None
+        try:
+            since = parse_datetime(value)
+            if since is None and parse_date(value) is not None:
+                since = parse_datetime(f'{value}T00:00:00')
+        except ValueError:
+            since = None
+        if since is None:
+            raise CommandError(f'Не удалось разобрать дату --since: {value}')
+        if timezone.is_naive(since):
+            since = timezone.make_aware(since)
+        return since
@@ -0,0 +1,80 @@
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DatabaseError, IntegrityError
+
+from blog.importing import FixtureImporter, iter_json_array, iter_json_lines
+
+
+class Command(BaseCommand):
+    help = ('Потоково загружает фикстуру JSON или JSONL с пользователями, '
+            'категориями, местами, публикациями и комментариями.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'fixture',
+            help='Путь к файлу фикстуры; «-» — читать из stdin.',
+        )
+        parser.add_argument(
+            '--format',
+            choices=('json', 'jsonl'),
+            help='Формат файла; по умолчанию определяется по расширению.',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=500,
+            help='Сколько объектов вставлять одной транзакцией.',
+        )
+        parser.add_argument(
+            '--database',
+            default='default',
+            help='База данных для загрузки.',
+        )
+
+    def handle(self, *args, **options):
+        if options['batch_size'] < 1:
+            raise CommandError('--batch-size должен быть положительным.')
+        path = options['fixture']
+        fixture_format = options['format'] or (
+            'jsonl' if path.endswith('.jsonl') else 'json'
+        )
+        reader = iter_json_lines if fixture_format == 'jsonl' else (
+            iter_json_array
+        )
+        importer = FixtureImporter(
+            batch_size=options['batch_size'],
+            using=options['database'],
+            progress=self.report if options['verbosity'] > 1 else None,
+        )
+        try:
+            if path == '-':
+                stats = importer.run(reader(sys.stdin))
+            else:
+                with open(path, encoding='utf-8') as stream:
+                    stats = importer.run(reader(stream))
+        except OSError as error:
+            raise CommandError(f'Не удалось прочитать фикстуру: {error}')
+        except ValueError as error:
+            raise CommandError(f'Ошибка разбора фикстуры: {error}')
+        except (IntegrityError, DatabaseError) as error:
+            raise CommandError(f'Ошибка записи в БД: {error}')
+        for item in stats:
+            self.stdout.write(self.style.SUCCESS(self.format_stats(item)))
+        if importer.ignored:
+            self.stdout.write(
+                f'Пропущено объектов других моделей: {importer.ignored}'
+            )
+
+    def report(self, stats):
+        self.stdout.write(self.format_stats(stats))
+
+    def format_stats(self, stats):
+        line = (f'{stats.label}: загружено {stats.created}, '
+                f'{stats.rate:.0f} строк/с')
+        if stats.skipped:
+            line += f', пропущено без связанных объектов {stats.skipped}'
+        if stats.links_skipped:
+            line += (f', не загружено связей многие-ко-многим '
+                     f'{stats.links_skipped}')
+        return line
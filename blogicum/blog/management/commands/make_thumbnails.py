@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand
+
+from blog.models import Post
+
+
+class Command(BaseCommand):
+    help = ('Ставит в очередь process_images фото публикаций, у которых '
+            'нет уменьшенных копий.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--all',
+            action='store_true',
+            help='Пересоздать копии для всех фото, а не только для новых.',
+        )
+
+    def handle(self, *args, **options):
+        posts = Post.objects.exclude(image='').only('image', 'image_variants')
+        queued = 0
+        for post in posts.iterator(chunk_size=100):
+            if 'fallback' in post.image_variants and not options['all']:
+                continue
+            post.queue_image_processing()
+            queued += 1
+        self.stdout.write(
+            self.style.SUCCESS(f'Поставлено в очередь фото: {queued}')
+        )
@@ -0,0 +1,42 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from blog.image_jobs import ImageWorker
+
+
+class Command(BaseCommand):
+    help = ('Создаёт уменьшенные копии фото из очереди в пуле процессов; '
+            'с --loop работает постоянно.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--loop',
+            action='store_true',
+            help='Не завершаться, а ждать новых фото.',
+        )
+        parser.add_argument(
+            '--interval',
+            type=int,
+            default=5,
+            help='Пауза между проверками пустой очереди, в секундах.',
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            help=('Число процессов пула; по умолчанию по числу ядер, '
+                  '0 — обрабатывать в текущем процессе.'),
+        )
+
+    def handle(self, *args, **options):
+        processed = 0
+        with ImageWorker(workers=options['workers']) as worker:
+            while True:
+                done = worker.run_once()
+                processed += done
+                if done:
+                    continue
+                if not options['loop']:
+                    break
+                time.sleep(options['interval'])
+        self.stdout.write(self.style.SUCCESS(f'Обработано фото: {processed}'))
@@ -0,0 +1,43 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from blog.utils import get_next_release_date, release_scheduled_posts
+
+
+class Command(BaseCommand):
+    help = ('Открывает отложенные публикации, время которых наступило; '
+            'с --loop работает постоянно.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--loop',
+            action='store_true',
+            help='Не завершаться, а ждать следующих публикаций.',
+        )
+        parser.add_argument(
+            '--interval',
+            type=int,
+            default=60,
+            help='Максимальная пауза между проверками, в секундах.',
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            released = release_scheduled_posts()
+            if released or not options['loop']:
+                self.stdout.write(
+                    self.style.SUCCESS(f'Опубликовано постов: {released}')
+                )
+            if not options['loop']:
+                return
+            time.sleep(self.get_delay(options['interval']))
+
+    def get_delay(self, interval):
+        now = timezone.now()
+        next_release = get_next_release_date(now)
+        if next_release is None:
+            return interval
+        delay = (next_release - now).total_seconds()
+        return min(max(delay, 0), interval)
@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+from django.db import DEFAULT_DB_ALIAS
+
+from blog.models import Comment, Post
+from blog.search import install_search_index
+
+
+class Command(BaseCommand):
+    help = ('Создаёт полнотекстовый индекс публикаций и комментариев '
+            'и заново заполняет его.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--database', default=DEFAULT_DB_ALIAS)
+
+    def handle(self, *args, **options):
+        for model in (Post, Comment):
+            install_search_index(model, options['database'], rebuild=True)
+        self.stdout.write(self.style.SUCCESS('Поисковый индекс перестроен'))
@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+
+from blog.utils import recount_comment_count
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает сохранённое количество комментариев к публикациям.'
+
+    def handle(self, *args, **options):
+        updated = recount_comment_count()
+        self.stdout.write(
+            self.style.SUCCESS(f'Пересчитано публикаций: {updated}')
+        )
@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+
+from blog.utils import render_post_texts
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает сохранённые анонсы и HTML текста публикаций.'
+
+    def handle(self, *args, **options):
+        updated = render_post_texts()
+        self.stdout.write(
+            self.style.SUCCESS(f'Обновлено публикаций: {updated}')
+        )
@@ -0,0 +1,17 @@
+from core.media import MEDIA_PRIVATE, MEDIA_PUBLIC, register_media_guard
+
+from .images import VARIANT_NAME_RE
+from .models import Post
+
+
+@register_media_guard(f'{Post.image.field.upload_to}/')
+def post_image_access(request, name):
+    """Копии фото без метаданных видны всем, оригинал — только автору."""
+    if VARIANT_NAME_RE.search(name):
+        return MEDIA_PUBLIC
+    user = request.user
+    if user.is_staff or (user.is_authenticated and Post.objects.filter(
+        image=name, author=user
+    ).exists()):
+        return MEDIA_PRIVATE
+    return None
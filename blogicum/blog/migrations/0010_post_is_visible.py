@@ -0,0 +1,31 @@
+# Generated by Django 3.2.16 on 2026-10-17 16:27
+
+from django.db import migrations, models
+
+
+def fill_is_visible(apps, schema_editor):
+    Post = apps.get_model('blog', 'Post')
+    Post.objects.filter(
+        is_published=True,
+        category__is_published=True,
+    ).update(is_visible=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0009_post_comment_count'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='is_visible',
+            field=models.BooleanField(default=False, editable=False, help_text='Публикация и её категория опубликованы; вычисляется автоматически.', verbose_name='Видна в лентах'),
+        ),
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(fields=['is_visible', 'pub_date'], name='post_visible_pub_date_idx'),
+        ),
+        migrations.RunPython(fill_is_visible, migrations.RunPython.noop),
+    ]
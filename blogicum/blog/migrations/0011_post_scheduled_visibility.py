@@ -0,0 +1,28 @@
+# Generated by Django 3.2.16 on 2026-10-17 17:27
+
+from django.db import migrations, models
+from django.utils import timezone
+
+
+def hide_scheduled_posts(apps, schema_editor):
+    Post = apps.get_model('blog', 'Post')
+    Post.objects.filter(
+        is_visible=True,
+        pub_date__gt=timezone.now(),
+    ).update(is_visible=False)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0010_post_is_visible'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='post',
+            name='is_visible',
+            field=models.BooleanField(default=False, editable=False, help_text='Публикация и её категория опубликованы, время публикации наступило; вычисляется автоматически.', verbose_name='Видна в лентах'),
+        ),
+        migrations.RunPython(hide_scheduled_posts, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,41 @@
+# Generated by Django 3.2.16 on 2026-10-17 17:39
+
+from django.db import migrations, models
+from django.template.defaultfilters import linebreaksbr
+from django.utils.text import Truncator
+
+
+def fill_rendered_text(apps, schema_editor):
+    Post = apps.get_model('blog', 'Post')
+    posts = []
+    for post in Post.objects.only('text').iterator(chunk_size=500):
+        excerpt = Truncator(post.text).words(10, truncate=' …')
+        post.excerpt = Truncator(excerpt).chars(512)
+        post.rendered_html = linebreaksbr(post.text, autoescape=True)
+        posts.append(post)
+        if len(posts) == 500:
+            Post.objects.bulk_update(posts, ['excerpt', 'rendered_html'])
+            posts = []
+    if posts:
+        Post.objects.bulk_update(posts, ['excerpt', 'rendered_html'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0012_feed_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='excerpt',
+            field=models.CharField(blank=True, editable=False, help_text='Первые слова текста для лент; вычисляется автоматически.', max_length=512, verbose_name='Анонс'),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='rendered_html',
+            field=models.TextField(blank=True, editable=False, help_text='Текст для страницы публикации; вычисляется автоматически.', verbose_name='Текст в HTML'),
+        ),
+        migrations.RunPython(fill_rendered_text, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 3.2.16 on 2026-10-17 17:46
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0014_post_view_count'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='image_variants',
+            field=models.JSONField(blank=True, default=dict, editable=False, help_text='Размеры оригинала и ширины уменьшенных копий; вычисляется автоматически.', verbose_name='Размеры фото'),
+        ),
+    ]
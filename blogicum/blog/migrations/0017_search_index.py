@@ -0,0 +1,28 @@
+from django.db import migrations
+
+from blog.search import drop_search_index, install_search_index
+
+
+def create_search_index(apps, schema_editor):
+    using = schema_editor.connection.alias
+    for model_name in ('Post', 'Comment'):
+        install_search_index(
+            apps.get_model('blog', model_name), using, rebuild=True
+        )
+
+
+def remove_search_index(apps, schema_editor):
+    using = schema_editor.connection.alias
+    for model_name in ('Post', 'Comment'):
+        drop_search_index(apps.get_model('blog', model_name), using)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0016_image_job'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, remove_search_index),
+    ]
@@ -1,13 +1,42 @@
 from django.contrib.auth import get_user_model
-from django.db import models
-from django.template.defaultfilters import truncatechars
+from django.db import models, transaction
+from django.template.defaultfilters import linebreaksbr, truncatechars
+from django.utils.text import Truncator
+from django.utils import timezone
 
 from core.models import PublishedModel
 
+from .images import MIME_TYPES, get_srcset, read_size, variant_name
+from .versioning import (bump_card_version, bump_feed_version,
+                         get_card_versions)
+
 User = get_user_model()
 
 MAX_TITLE_LENGTH = 256
 
+EXCERPT_WORDS = 10
+EXCERPT_MAX_LENGTH = 512
+
+VISIBILITY_FIELDS = {'is_published', 'category', 'category_id', 'pub_date'}
+
+RENDERED_FIELDS = ('excerpt', 'rendered_html')
+
+
+class CategoryQuerySet(models.QuerySet):
+
+    def update(self, **kwargs):
+        if 'is_published' not in kwargs:
+            return super().update(**kwargs)
+        with transaction.atomic(using=self.db):
+            category_ids = list(self.values_list('pk', flat=True))
+            rows = super().update(**kwargs)
+            Post.objects.filter(
+                category_id__in=category_ids
+            ).refresh_visibility()
+        for pk in category_ids:
+            bump_card_version('category', pk)
+        return rows
+
 
 class Category(PublishedModel):
     title = models.CharField(
@@ -23,6 +52,8 @@ class Category(PublishedModel):
                    'разрешены символы латиницы, цифры, дефис и подчёркивание.')
     )
 
+    objects = CategoryQuerySet.as_manager()
+
     class Meta:
         verbose_name = 'категория'
         verbose_name_plural = 'Категории'
@@ -30,6 +61,20 @@ class Category(PublishedModel):
     def __str__(self):
         return self.title
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_is_published = instance.__dict__.get('is_published')
+        return instance
+
+    def save(self, *args, **kwargs):
+        loaded_is_published = getattr(self, '_loaded_is_published', None)
+        with transaction.atomic(using=kwargs.get('using')):
+            super().save(*args, **kwargs)
+            if self.is_published != loaded_is_published:
+                self.posts.refresh_visibility()
+        self._loaded_is_published = self.is_published
+
 
 class Location(PublishedModel):
     name = models.CharField(
@@ -45,6 +90,48 @@ class Location(PublishedModel):
         return self.name
 
 
+class PostQuerySet(models.QuerySet):
+
+    def refresh_visibility(self):
+        """Пересчитать флаг is_visible одним проходом по выборке.
+
+        Версии карточек увеличивает вызывающий код: после изменения постов
+        — версии этих постов, после изменения категории — одну версию
+        категории, от которой зависят карточки и страницы всех её постов.
+        """
+        visible = models.Q(
+            is_published=True,
+            category__is_published=True,
+            pub_date__lte=timezone.now(),
+        )
+        shown = self.filter(visible, is_visible=False).update(is_visible=True)
+        hidden = self.exclude(visible).filter(
+            is_visible=True
+        ).update(is_visible=False)
+        if shown or hidden:
+            bump_feed_version()
+        return shown + hidden
+
+    def scheduled(self):
+        """Публикации, которые станут видимыми при наступлении pub_date."""
+        return self.filter(
+            is_visible=False,
+            is_published=True,
+            category__is_published=True,
+        )
+
+    def update(self, **kwargs):
+        if not VISIBILITY_FIELDS.intersection(kwargs):
+            return super().update(**kwargs)
+        with transaction.atomic(using=self.db):
+            post_ids = list(self.values_list('pk', flat=True))
+            rows = super().update(**kwargs)
+            Post.objects.filter(pk__in=post_ids).refresh_visibility()
+        for pk in post_ids:
+            bump_card_version('post', pk)
+        return rows
+
+
 class Post(PublishedModel):
     title = models.CharField(
         'Публикация',
@@ -79,15 +166,179 @@ class Post(PublishedModel):
         upload_to='post_images',
         blank=True
     )
+    comment_count = models.PositiveIntegerField(
+        'Количество комментариев',
+        default=0,
+        editable=False
+    )
+    view_count = models.PositiveBigIntegerField(
+        'Просмотры',
+        default=0,
+        editable=False
+    )
+    excerpt = models.CharField(
+        'Анонс',
+        max_length=EXCERPT_MAX_LENGTH,
+        blank=True,
+        editable=False,
+        help_text='Первые слова текста для лент; вычисляется автоматически.'
+    )
+    rendered_html = models.TextField(
+        'Текст в HTML',
+        blank=True,
+        editable=False,
+        help_text='Текст для страницы публикации; вычисляется автоматически.'
+    )
+    image_variants = models.JSONField(
+        'Размеры фото',
+        default=dict,
+        blank=True,
+        editable=False,
+        help_text=('Размеры оригинала и ширины уменьшенных копий; '
+                   'вычисляется автоматически.')
+    )
+    is_visible = models.BooleanField(
+        'Видна в лентах',
+        default=False,
+        editable=False,
+        help_text=('Публикация и её категория опубликованы, '
+                   'время публикации наступило; вычисляется автоматически.')
+    )
+
+    objects = PostQuerySet.as_manager()
 
     class Meta:
         default_related_name = 'posts'
         verbose_name = 'публикация'
         verbose_name_plural = 'Публикации'
+        indexes = (
+            models.Index(
+                fields=('-pub_date', 'title'),
+                name='post_visible_feed_idx',
+                condition=models.Q(is_visible=True)
+            ),
+            models.Index(
+                fields=('category', '-pub_date', 'title'),
+                name='post_category_feed_idx',
+                condition=models.Q(is_visible=True)
+            ),
+            models.Index(
+                fields=('author', '-pub_date', 'title'),
+                name='post_author_feed_idx'
+            ),
+            models.Index(
+                fields=('pub_date',),
+                name='post_scheduled_idx',
+                condition=models.Q(is_visible=False)
+            ),
+        )
 
     def __str__(self):
         return self.title
 
+    @property
+    def card_version(self):
+        """Версия карточки в лентах для ключа фрагментного кэша."""
+        if '_card_version' not in self.__dict__:
+            self._card_version = get_card_versions([self])[self.pk]
+        return self._card_version
+
+    @property
+    def image_pending(self):
+        """Фото ждёт обработки: вместо него выводится заглушка."""
+        return bool(self.image) and 'widths' not in self.image_variants
+
+    @property
+    def image_ready(self):
+        """Копии без метаданных готовы; без них фото не выводится."""
+        return bool(self.image) and 'fallback' in self.image_variants
+
+    @property
+    def image_url(self):
+        """Адрес фото для всех: копия без метаданных, а не оригинал."""
+        variants = self.image_variants
+        if 'fallback' not in variants:
+            return ''
+        return self.image.storage.url(variant_name(
+            self.image.name, variants['width'], variants['fallback'],
+            variants.get('digest')
+        ))
+
+    @property
+    def image_srcset(self):
+        """Значение srcset для фото со всеми уменьшенными копиями."""
+        if not self.image_ready:
+            return ''
+        return get_srcset(self.image, self.image_variants)
+
+    @property
+    def image_sources(self):
+        """Пары (MIME-тип, srcset) для <source> в WebP и AVIF."""
+        variants = self.image_variants
+        if not self.image_ready:
+            return []
+        return [(MIME_TYPES[ext], get_srcset(self.image, variants, ext))
+                for ext in variants.get('formats', ())]
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_image = instance.__dict__.get('image')
+        return instance
+
+    def render_text(self):
+        """Подготовить анонс и HTML текста для вывода в шаблонах."""
+        excerpt = Truncator(self.text).words(EXCERPT_WORDS, truncate=' …')
+        self.excerpt = Truncator(excerpt).chars(EXCERPT_MAX_LENGTH)
+        self.rendered_html = linebreaksbr(self.text, autoescape=True)
+
+    def save(self, *args, **kwargs):
+        update_fields = kwargs.get('update_fields')
+        if update_fields is None or 'text' in update_fields:
+            self.render_text()
+        self.is_visible = bool(
+            self.is_published
+            and self.category_id
+            and self.category.is_published
+            and self.pub_date <= timezone.now()
+        )
+        if update_fields is not None:
+            computed = {'is_visible'}
+            if 'text' in update_fields:
+                computed.update(RENDERED_FIELDS)
+            kwargs['update_fields'] = {*update_fields, *computed}
+        super().save(*args, **kwargs)
+        if self.image_changed(update_fields):
+            self.queue_image_processing()
+
+    def image_changed(self, update_fields=None):
+        """Сменилось ли фото с момента загрузки из БД."""
+        if update_fields is not None and 'image' not in update_fields:
+            return False
+        if 'image' in self.get_deferred_fields():
+            return False
+        loaded = getattr(self, '_loaded_image', None) or ''
+        return (self.image.name or '') != loaded
+
+    def queue_image_processing(self):
+        """Поставить фото в очередь обработчика process_images.
+
+        До готовности уменьшенных копий в шаблонах выводится заглушка
+        с размерами оригинала, прочитанными из заголовка файла.
+        """
+        self.image_variants = read_size(self.image)
+        self._loaded_image = self.image.name
+        with transaction.atomic():
+            Post.objects.filter(pk=self.pk).update(
+                image_variants=self.image_variants
+            )
+            ImageJob.objects.filter(
+                post_id=self.pk, started_at__isnull=True
+            ).delete()
+            if self.image:
+                ImageJob.objects.create(post=self, image=self.image.name)
+        bump_card_version('post', self.pk)
+
 
 class Comment(PublishedModel):
     text = models.TextField('Текст комментария')
@@ -104,6 +355,46 @@ class Comment(PublishedModel):
         verbose_name = 'комментарий'
         verbose_name_plural = 'Комментарии'
         ordering = ('created_at',)
+        indexes = (
+            models.Index(
+                fields=('post', 'created_at'),
+                name='comment_post_created_idx'
+            ),
+        )
 
     def __str__(self):
         return truncatechars(self.text, 30)
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_post_id = instance.__dict__.get('post_id')
+        return instance
+
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        self._loaded_post_id = self.post_id
+
+
+class ImageJob(models.Model):
+    """Задача на создание уменьшенных копий фото публикации."""
+
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='image_jobs',
+        verbose_name='Публикация'
+    )
+    image = models.CharField('Файл', max_length=255)
+    created_at = models.DateTimeField('Добавлено', auto_now_add=True)
+    started_at = models.DateTimeField('Взято в работу', null=True, blank=True)
+    attempts = models.PositiveSmallIntegerField('Попыток', default=0)
+    error = models.TextField('Последняя ошибка', blank=True)
+
+    class Meta:
+        verbose_name = 'обработка фото'
+        verbose_name_plural = 'Обработка фото'
+        ordering = ('created_at',)
+
+    def __str__(self):
+        return self.image
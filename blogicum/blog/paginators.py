@@ -0,0 +1,244 @@
+import base64
+import binascii
+import json
+import math
+from collections.abc import Sequence
+from types import SimpleNamespace
+
+from django.core.exceptions import ValidationError
+from django.utils.functional import cached_property
+from django.db.models import Q
+
+FEED_ORDERING = ('-pub_date', 'title', 'id')
+COMMENT_ORDERING = ('created_at', 'id')
+
+
+class InvalidCursor(Exception):
+    pass
+
+
+class CursorPage(Sequence):
+
+    def __init__(self, object_list, number, paginator,
+                 next_cursor=None, previous_cursor=None):
+        self.object_list = object_list
+        self.number = number
+        self.paginator = paginator
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+    def __repr__(self):
+        return f'<CursorPage {self.number}>'
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __getitem__(self, index):
+        return self.object_list[index]
+
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+    def has_other_pages(self):
+        return self.has_next() or self.has_previous()
+
+
+class CursorPaginator:
+    """Постраничный вывод по ключу сортировки (keyset) вместо OFFSET.
+
+    Страница выбирается непрозрачным курсором, в котором закодированы
+    значения полей сортировки крайней записи соседней страницы, поэтому
+    стоимость запроса не зависит от глубины страницы и не требует COUNT.
+    Число записей (или функцию, которая его вернёт) можно передать в count,
+    тогда становятся известны номер последней страницы и их количество.
+    """
+
+    def __init__(self, object_list, per_page, ordering=FEED_ORDERING,
+                 count=None):
+        self.object_list = object_list
+        self.per_page = int(per_page)
+        self.ordering = tuple(ordering)
+        self.fields = [
+            (name.lstrip('-'), name.startswith('-')) for name in self.ordering
+        ]
+        self._count = count
+        self.invalid_cursor = False
+
+    @cached_property
+    def count(self):
+        return self._count() if callable(self._count) else self._count
+
+    @cached_property
+    def num_pages(self):
+        if self.count is None:
+            return None
+        return max(1, math.ceil(self.count / self.per_page))
+
+    def get_page(self, after=None, before=None, last=False):
+        """Вернуть страницу по курсору; битый курсор ведёт на первую.
+
+        После битого курсора invalid_cursor становится True.
+        """
+        try:
+            if after:
+                return self._page_after(*self.decode_cursor(after))
+            if before:
+                return self._page_before(*self.decode_cursor(before))
+        except InvalidCursor:
+            self.invalid_cursor = True
+        if last:
+            return self._page_last()
+        return self._page_after(None, 1)
+
+    def get_following_cursors(self, page, count):
+        """Курсоры count страниц после page и признак, что есть ещё.
+
+        Читаются только поля сортировки, поэтому запрос обслуживается
+        индексом ленты и не загружает сами публикации.
+        """
+        if not page.has_next() or page.number is None:
+            return [], page.has_next()
+        keys = self._keys(page[-1], True, self.per_page * count + 1)
+        cursors = [page.next_cursor]
+        for index in range(self.per_page - 1, len(keys) - 1, self.per_page):
+            if len(cursors) == count:
+                break
+            cursors.append(
+                self.encode_cursor(keys[index], page.number + len(cursors) + 1)
+            )
+        return cursors, len(keys) > self.per_page * count
+
+    def get_preceding_cursors(self, page, count):
+        """Курсоры до count предыдущих страниц, от ближней к дальней."""
+        if not page.has_previous() or page.number is None:
+            return []
+        count = min(count, page.number - 1)
+        keys = self._keys(page[0], False, self.per_page * (count - 1))
+        cursors = [page.previous_cursor]
+        for index in range(self.per_page - 1, len(keys), self.per_page):
+            if len(cursors) == count:
+                break
+            cursors.append(
+                self.encode_cursor(keys[index], page.number - len(cursors) - 1)
+            )
+        return cursors
+
+    def encode_cursor(self, obj, number):
+        opts = self.object_list.model._meta
+        payload = {
+            'k': [
+                opts.get_field(name).value_to_string(obj)
+                for name, _ in self.fields
+            ],
+            'n': number,
+        }
+        raw = json.dumps(payload, separators=(',', ':')).encode()
+        return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+    def decode_cursor(self, cursor):
+        opts = self.object_list.model._meta
+        try:
+            raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+            payload = json.loads(raw)
+            values = [
+                opts.get_field(name).to_python(value)
+                for (name, _), value in zip(self.fields, payload['k'])
+            ]
+            number = payload['n']
+            if number is not None:
+                number = int(number)
+        except (binascii.Error, ValueError, KeyError, TypeError,
+                ValidationError):
+            raise InvalidCursor(cursor)
+        if len(values) != len(self.fields) or (
+                number is not None and number < 1):
+            raise InvalidCursor(cursor)
+        # Курсор принимается только в том виде, в каком его выдаёт сайт.
+        names = [name for name, _ in self.fields]
+        key = SimpleNamespace(**dict(zip(names, values)))
+        if self.encode_cursor(key, number) != cursor:
+            raise InvalidCursor(cursor)
+        return values, number
+
+    def _keys(self, obj, forward, limit):
+        """Поля сортировки limit записей после (или до) obj."""
+        names = [name for name, _ in self.fields]
+        values = [getattr(obj, name) for name in names]
+        ordering = self.ordering if forward else self._reverse_ordering()
+        rows = self.object_list.select_related(None).prefetch_related(
+            None
+        ).order_by(*ordering).filter(
+            self._keyset_filter(values, forward)
+        ).values_list(*names)[:limit]
+        return [SimpleNamespace(**dict(zip(names, row))) for row in rows]
+
+    def _reverse_ordering(self):
+        return [
+            name[1:] if name.startswith('-') else f'-{name}'
+            for name in self.ordering
+        ]
+
+    def _keyset_filter(self, values, forward):
+        condition = Q()
+        equal = Q()
+        for (name, descending), value in zip(self.fields, values):
+            lookup = 'lt' if descending == forward else 'gt'
+            condition |= equal & Q(**{f'{name}__{lookup}': value})
+            equal &= Q(**{name: value})
+        return condition
+
+    def _page_after(self, values, number):
+        queryset = self.object_list.order_by(*self.ordering)
+        if values is not None:
+            queryset = queryset.filter(self._keyset_filter(values, True))
+        rows = list(queryset[:self.per_page + 1])
+        has_next = len(rows) > self.per_page
+        rows = rows[:self.per_page]
+        return self._make_page(
+            rows, number, has_next=has_next, has_previous=number > 1
+        )
+
+    def _page_before(self, values, number):
+        queryset = self.object_list.order_by(
+            *self._reverse_ordering()
+        ).filter(
+            self._keyset_filter(values, False)
+        )
+        rows = list(queryset[:self.per_page + 1])
+        has_previous = len(rows) > self.per_page
+        rows = rows[:self.per_page][::-1]
+        if not has_previous:
+            number = 1
+        return self._make_page(
+            rows, number, has_next=True, has_previous=has_previous
+        )
+
+    def _page_last(self):
+        """Последняя страница; без count её номер неизвестен."""
+        queryset = self.object_list.order_by(*self._reverse_ordering())
+        number, size = None, self.per_page
+        if self.num_pages is not None:
+            number = self.num_pages
+            size = self.count - (number - 1) * self.per_page or size
+        rows = list(queryset[:size + 1])
+        has_previous = len(rows) > size
+        rows = rows[:size][::-1]
+        return self._make_page(
+            rows, number if has_previous else 1,
+            has_next=False, has_previous=has_previous
+        )
+
+    def _make_page(self, rows, number, has_next, has_previous):
+        next_cursor = previous_cursor = None
+        if rows and has_next:
+            next_cursor = self.encode_cursor(
+                rows[-1], number and number + 1
+            )
+        if rows and has_previous:
+            previous_cursor = self.encode_cursor(
+                rows[0], number and number - 1
+            )
+        return CursorPage(rows, number, self, next_cursor, previous_cursor)
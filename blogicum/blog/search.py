@@ -0,0 +1,134 @@
+import re
+
+from django.db import connections
+from django.db.models import Q
+from django.db.models.expressions import RawSQL
+
+MAX_TERMS = 10
+
+TERM_RE = re.compile(r'\w+')
+
+# Полнотекстовые индексы SQLite FTS5: таблица индекса, индексируемые
+# столбцы и их веса для bm25.
+SEARCH_INDEXES = {
+    'blog.post': ('blog_post_fts', ('title', 'text'), (10.0, 1.0)),
+    'blog.comment': ('blog_comment_fts', ('text',), (1.0,)),
+}
+
+
+def get_index(model):
+    return SEARCH_INDEXES[model._meta.label_lower]
+
+
+def has_fts(using):
+    return connections[using].vendor == 'sqlite'
+
+
+def index_sql(model):
+    """SQL для создания индекса FTS5 и триггеров синхронизации с моделью.
+
+    Индекс хранит только словарь (content=...), тексты читаются из самой
+    таблицы модели. Триггеры ловят и save(), и QuerySet.update(), и
+    bulk_create(); CREATE ... IF NOT EXISTS позволяет повторять этот SQL
+    после миграций, которые пересоздают таблицу модели.
+    """
+    table, columns, weights = get_index(model)
+    source = model._meta.db_table
+    pk = model._meta.pk.column
+    names = ', '.join(columns)
+    new = ', '.join(f'new.{column}' for column in columns)
+    old = ', '.join(f'old.{column}' for column in columns)
+    insert = f'INSERT INTO {table}(rowid, {names}) VALUES (new.{pk}, {new});'
+    delete = (f"INSERT INTO {table}({table}, rowid, {names}) "
+              f"VALUES ('delete', old.{pk}, {old});")
+    return [
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {table} USING fts5("
+        f"{names}, content='{source}', content_rowid='{pk}', "
+        f"tokenize='unicode61 remove_diacritics 2')",
+        f"INSERT INTO {table}({table}, rank) "
+        f"VALUES ('rank', 'bm25({', '.join(map(str, weights))})')",
+        f'CREATE TRIGGER IF NOT EXISTS {table}_ai AFTER INSERT ON {source} '
+        f'BEGIN {insert} END',
+        f'CREATE TRIGGER IF NOT EXISTS {table}_ad AFTER DELETE ON {source} '
+        f'BEGIN {delete} END',
+        f'CREATE TRIGGER IF NOT EXISTS {table}_au '
+        f'AFTER UPDATE OF {names} ON {source} BEGIN {delete} {insert} END',
+    ]
+
+
+def install_search_index(model, using, rebuild=False):
+    """Создать индекс и триггеры; с rebuild — переиндексировать тексты."""
+    if not has_fts(using):
+        return
+    table = get_index(model)[0]
+    with connections[using].cursor() as cursor:
+        for sql in index_sql(model):
+            cursor.execute(sql)
+        if rebuild:
+            cursor.execute(
+                f"INSERT INTO {table}({table}) VALUES ('rebuild')"
+            )
+
+
+def drop_search_index(model, using):
+    if not has_fts(using):
+        return
+    table = get_index(model)[0]
+    with connections[using].cursor() as cursor:
+        for suffix in ('ai', 'ad', 'au'):
+            cursor.execute(f'DROP TRIGGER IF EXISTS {table}_{suffix}')
+        cursor.execute(f'DROP TABLE IF EXISTS {table}')
+
+
+def match_expression(query):
+    """Запрос FTS5 из слов пользователя: все слова, каждое как префикс.
+
+    Операторы и кавычки FTS5 из ввода не пропускаются, поэтому любой ввод
+    даёт корректный запрос.
+    """
+    terms = TERM_RE.findall(query)[:MAX_TERMS]
+    return ' '.join(f'"{term}"*' for term in terms)
+
+
+def filter_matching(queryset, query):
+    """Объекты выборки, в тексте которых есть все слова запроса."""
+    match = match_expression(query)
+    if not match:
+        return queryset.none()
+    model = queryset.model
+    table, columns, _ = get_index(model)
+    if not has_fts(queryset.db):
+        condition = Q()
+        for term in TERM_RE.findall(query)[:MAX_TERMS]:
+            condition &= Q(*(Q(**{f'{column}__icontains': term})
+                             for column in columns), _connector=Q.OR)
+        return queryset.filter(condition)
+    return queryset.filter(pk__in=RawSQL(
+        f'SELECT rowid FROM {table} WHERE {table} MATCH %s', (match,)
+    ))
+
+
+def rank_matching(queryset, query):
+    """Найденные объекты с рангом bm25 в search_rank, лучшие первыми.
+
+    Таблица индекса присоединяется к выборке, так что MATCH выполняется
+    один раз на запрос, а не для каждой найденной строки.
+    """
+    if not has_fts(queryset.db):
+        return filter_matching(queryset, query)
+    match = match_expression(query)
+    if not match:
+        return queryset.none()
+    model = queryset.model
+    table = get_index(model)[0]
+    connection = connections[queryset.db]
+    pk = '{}.{}'.format(
+        connection.ops.quote_name(model._meta.db_table),
+        connection.ops.quote_name(model._meta.pk.column),
+    )
+    return queryset.extra(
+        select={'search_rank': f'{table}.rank'},
+        tables=[table],
+        where=[f'{table}.rowid = {pk}', f'{table} MATCH %s'],
+        params=[match],
+    ).order_by('search_rank', *queryset.query.order_by)
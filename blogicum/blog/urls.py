@@ -13,6 +13,8 @@ posts_urls = [
          views.PostUpdateView.as_view(), name='edit_post'),
     path('<int:post_pk>/delete/',
          views.PostDeleteView.as_view(), name='delete_post'),
+    path('<int:post_pk>/comments/',
+         views.post_comments, name='post_comments'),
     path('<int:post_pk>/comment/',
          views.add_comment, name='add_comment'),
     path('<int:post_pk>/edit_comment/<int:comment_pk>/',
@@ -34,4 +36,5 @@ urlpatterns = [
     path('profile/', include(profile_urls)),
     path('category/<slug:category_slug>/',
          views.category_posts, name='category_posts'),
+    path('search/', views.search, name='search'),
 ]
@@ -1,41 +1,229 @@
-from django.db.models import Count, Prefetch
+from collections import namedtuple
+
+from django.db.models import Count, OuterRef, Prefetch, Subquery
+from django.db.models.functions import Coalesce
 from django.conf import settings
-from django.core.paginator import Paginator
+from django.core.cache import cache
 from django.shortcuts import get_object_or_404
 from django.utils import timezone
 
-from .models import Comment, Location, Post
+from core.page_cache import add_page_dependencies, exclude_from_page_cache
+
+from .models import RENDERED_FIELDS, Comment, Location, Post
+from .paginators import COMMENT_ORDERING, FEED_ORDERING, CursorPaginator
+from .versioning import (FEED_VERSION_KEY, bump_card_versions,
+                         bump_feed_version, card_dependencies,
+                         get_card_versions, get_feed_version, get_versions)
+
+FEED_COUNT_KEY = 'blog:feed_count:{}:{}'
+
+PageLink = namedtuple('PageLink', ('label', 'query', 'is_current'))
+
+ELLIPSIS = PageLink('…', None, False)
 
 
-def get_base_query():
-    published_categories = Location.objects.filter(is_published=True)
-    return Post.objects.select_related(
+def get_feed_query(author=None, category=None, only_visible=True):
+    """Единый запрос для лент публикаций.
+
+    Автор, категория и местоположение загружаются вместе с публикациями,
+    поэтому число запросов на страницу не зависит от её размера.
+    Без only_visible в ленту попадают и скрытые публикации — так автор
+    видит все свои посты в профиле.
+    """
+    published_locations = Location.objects.filter(is_published=True)
+    post_list = Post.objects.select_related(
         'author',
         'category',
     ).prefetch_related(
-        Prefetch('location', published_categories)
-    ).filter(
-        pub_date__lte=timezone.now(),
-        is_published=True,
-        category__is_published=True,
-    ).annotate(
-        comment_count=Count('comments')
-    ).order_by(
-        '-pub_date', 'title'
+        Prefetch('location', published_locations)
+    ).defer(
+        'text',
+        'rendered_html',
+        'view_count',
     )
+    if only_visible:
+        post_list = post_list.filter(is_visible=True)
+    if author is not None:
+        post_list = post_list.filter(author=author)
+    if category is not None:
+        post_list = post_list.filter(category=category)
+    return post_list.order_by(*FEED_ORDERING)
 
 
 def get_comment_instance(request, post_pk, comment_pk):
     instance = get_object_or_404(
-        Comment,
+        Comment.objects.only('post_id', 'author_id', 'text'),
         pk=comment_pk,
         post_id=post_pk,
     )
     return instance
 
 
-def get_page_obj(request, post_list):
-    paginator = Paginator(post_list, settings.POSTS_PER_PAGE)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+def get_comments_page(request, post):
+    """Страница комментариев к посту по курсору ?after=.
+
+    Общее число комментариев берётся из счётчика Post.comment_count.
+    """
+    paginator = CursorPaginator(
+        post.comments.select_related('author'),
+        settings.COMMENTS_PER_PAGE,
+        ordering=COMMENT_ORDERING,
+        count=post.comment_count,
+    )
+    page = paginator.get_page(after=request.GET.get('after'))
+    if paginator.invalid_cursor:
+        exclude_from_page_cache(request)
+    return page
+
+
+def save_rendered_texts(posts):
+    Post.objects.bulk_update(posts, RENDERED_FIELDS)
+    bump_card_versions('post', [post.pk for post in posts])
+    return len(posts)
+
+
+def render_post_texts(posts=None, batch_size=500):
+    """Пересчитать анонсы и HTML текста публикаций пачками.
+
+    Версии карточек пачки увеличиваются, чтобы кэш не показывал
+    прежние анонсы.
+    """
+    if posts is None:
+        posts = Post.objects.all()
+    batch = []
+    updated = 0
+    for post in posts.only('text').iterator(chunk_size=batch_size):
+        post.render_text()
+        batch.append(post)
+        if len(batch) == batch_size:
+            updated += save_rendered_texts(batch)
+            batch = []
+    if batch:
+        updated += save_rendered_texts(batch)
+    return updated
+
+
+def get_feed_count(feed, post_list):
+    """Число публикаций в ленте feed из кэша.
+
+    Ключ включает версию лент, поэтому после публикации, снятия с
+    публикации или удаления поста подсчёт выполняется заново.
+    """
+    key = FEED_COUNT_KEY.format(get_feed_version(), feed)
+    count = cache.get(key)
+    if count is None:
+        count = post_list.order_by().count()
+        cache.set(key, count, settings.FEED_COUNT_CACHE_TIMEOUT)
+    return count
+
+
+def get_page_obj(request, post_list, feed=None):
+    count = None
+    if feed is not None:
+        def count():
+            return get_feed_count(feed, post_list)
+    paginator = CursorPaginator(
+        post_list, settings.POSTS_PER_PAGE, count=count
+    )
+    last = request.GET.get('last')
+    page_obj = paginator.get_page(
+        after=request.GET.get('after'),
+        before=request.GET.get('before'),
+        last=bool(last),
+    )
+    if paginator.invalid_cursor or last not in (None, '1'):
+        # Страница по испорченной ссылке не кэшируется под своим ключом.
+        exclude_from_page_cache(request)
+    page_obj.window = get_page_window(page_obj)
+    attach_card_versions(page_obj.object_list)
+    get_feed_version()
+    add_page_dependencies(request, [FEED_VERSION_KEY])
+    for post in page_obj.object_list:
+        add_page_dependencies(request, card_dependencies(post))
     return page_obj
+
+
+def add_version_dependencies(request, keys):
+    """Привязать кэш страницы к версиям keys, заведя недостающие."""
+    keys = list(keys)
+    get_versions(keys)
+    add_page_dependencies(request, keys)
+
+
+def get_page_window(page_obj, on_each_side=None):
+    """Ссылки пагинатора: первая, соседние с текущей, последняя.
+
+    Соседние страницы берутся из курсоров, а не из page_range, поэтому
+    размер блока не зависит от числа страниц в ленте. Пропуски
+    обозначаются ELLIPSIS; query у первой страницы пустой.
+    """
+    if on_each_side is None:
+        on_each_side = settings.PAGINATION_ON_EACH_SIDE
+    paginator = page_obj.paginator
+    number = page_obj.number
+    preceding = paginator.get_preceding_cursors(page_obj, on_each_side)
+    following, has_more = paginator.get_following_cursors(
+        page_obj, on_each_side
+    )
+    window = []
+    if page_obj.has_previous():
+        first_shown = number - len(preceding) if number else None
+        if first_shown != 1:
+            window.append(PageLink('1', '', False))
+        if first_shown is None or first_shown > 2:
+            window.append(ELLIPSIS)
+    for offset, cursor in reversed(list(enumerate(preceding, 1))):
+        query = '' if number - offset == 1 else f'before={cursor}'
+        window.append(PageLink(str(number - offset), query, False))
+    window.append(PageLink(str(number) if number else '…', None, True))
+    for offset, cursor in enumerate(following, 1):
+        window.append(PageLink(str(number + offset), f'after={cursor}', False))
+    if has_more:
+        num_pages = paginator.num_pages
+        if num_pages is None:
+            window.append(ELLIPSIS)
+            window.append(PageLink('Последняя', 'last=1', False))
+            return window
+        if num_pages > number + len(following) + 1:
+            window.append(ELLIPSIS)
+        window.append(PageLink(str(num_pages), 'last=1', False))
+    return window
+
+
+def attach_card_versions(posts):
+    versions = get_card_versions(posts)
+    for post in posts:
+        post._card_version = versions[post.pk]
+
+
+def recount_comment_count(posts=None):
+    if posts is None:
+        posts = Post.objects.all()
+    comment_count = Comment.objects.filter(
+        post=OuterRef('pk')
+    ).order_by().values('post').annotate(
+        count=Count('pk')
+    ).values('count')
+    return posts.update(
+        comment_count=Coalesce(Subquery(comment_count), 0)
+    )
+
+
+def release_scheduled_posts(now=None):
+    """Открыть отложенные публикации, время которых наступило."""
+    if now is None:
+        now = timezone.now()
+    released = Post.objects.scheduled().filter(
+        pub_date__lte=now
+    ).update(is_visible=True)
+    if released:
+        bump_feed_version()
+    return released
+
+
+def get_next_release_date(now=None):
+    if now is None:
+        now = timezone.now()
+    return Post.objects.scheduled().filter(
+        pub_date__gt=now
+    ).order_by('pub_date').values_list('pub_date', flat=True).first()
@@ -0,0 +1,79 @@
+import time
+
+from django.core.cache import cache
+
+FEED_VERSION_KEY = 'blog:feed_version'
+CARD_VERSION_KEY = 'blog:card_version:{}:{}'
+
+
+def get_versions(keys):
+    """Прочитать версии одним запросом к кэшу, заведя недостающие."""
+    versions = cache.get_many(keys)
+    missing = {key: time.time_ns() for key in keys if key not in versions}
+    if missing:
+        # Ключ мог быть вытеснен из кэша: начинаем с метки времени,
+        # чтобы не совпасть ни с одной из уже выданных версий.
+        cache.set_many(missing, timeout=None)
+        versions.update(missing)
+    return versions
+
+
+def bump_version(key):
+    # Не incr(): в файловом кэше это чтение и запись, и из двух
+    # одновременных увеличений одно терялось бы. Новая метка времени
+    # отличается от прежней версии, кто бы из процессов ни записал её.
+    version = time.time_ns()
+    cache.set(key, version, timeout=None)
+    return version
+
+
+def get_feed_version():
+    """Текущая версия лент; меняется только при изменении их содержимого."""
+    return get_versions([FEED_VERSION_KEY])[FEED_VERSION_KEY]
+
+
+def bump_feed_version():
+    return bump_version(FEED_VERSION_KEY)
+
+
+def card_version_key(model_name, pk):
+    return CARD_VERSION_KEY.format(model_name, pk)
+
+
+def bump_card_version(model_name, pk):
+    return bump_version(card_version_key(model_name, pk))
+
+
+def bump_card_versions(model_name, pks):
+    """Увеличить версии карточек многих объектов одной записью в кэш."""
+    version = time.time_ns()
+    cache.set_many(
+        {card_version_key(model_name, pk): version for pk in pks},
+        timeout=None,
+    )
+
+
+def card_dependencies(post):
+    return (
+        card_version_key('post', post.pk),
+        card_version_key('category', post.category_id),
+        card_version_key('location', post.location_id),
+        card_version_key('user', post.author_id),
+    )
+
+
+def get_card_versions(posts):
+    """Версии карточек публикаций: {pk: версия} за один запрос к кэшу.
+
+    Версия карточки складывается из версий самой публикации, её
+    категории, местоположения и автора, которые увеличиваются
+    сигналами при изменении соответствующих записей.
+    """
+    dependencies = {post.pk: card_dependencies(post) for post in posts}
+    versions = get_versions(
+        list({key for keys in dependencies.values() for key in keys})
+    )
+    return {
+        pk: '.'.join(str(versions[key]) for key in keys)
+        for pk, keys in dependencies.items()
+    }
@@ -1,17 +1,29 @@
-from django.db.models import Count, Prefetch
+from functools import wraps
+
+from django.db import transaction
+from django.db.models import Prefetch
 from django.conf import settings
 from django.contrib.auth.decorators import login_required
 from django.contrib.auth.mixins import LoginRequiredMixin
+from django.core.paginator import Paginator
 from django.http import Http404
 from django.shortcuts import get_object_or_404, redirect, render
 from django.urls import reverse
-from django.utils import timezone
+from django.utils.decorators import method_decorator
 from django.views.generic import (CreateView, DeleteView, DetailView, ListView,
                                   UpdateView)
 
+from core.page_cache import (cache_page_with_holes, exclude_from_page_cache,
+                             render_with_holes)
+
+from .counters import count_post_view
 from .forms import CommentForm, PostForm, UpdateUserForm
 from .models import Category, Post, User, Location
-from .utils import get_base_query, get_comment_instance, get_page_obj
+from .search import rank_matching
+from .utils import (add_version_dependencies, attach_card_versions,
+                    get_comment_instance, get_comments_page, get_feed_query,
+                    get_page_obj)
+from .versioning import card_dependencies, card_version_key
 
 
 class PostMixin:
@@ -27,22 +39,56 @@ class PostMixin:
 
 
 class PostEditMixin:
+    """Доступ к правке и удалению поста только для его автора.
+
+    Пост загружается один раз и переиспользуется в get/post и форме.
+    """
     pk_url_kwarg = 'post_pk'
 
+    def get_queryset(self):
+        # Счётчики меняются через F(); форма не должна их перезаписывать.
+        return Post.objects.defer('comment_count', 'view_count')
+
+    def get_object(self, queryset=None):
+        if not hasattr(self, '_post'):
+            self._post = super().get_object(queryset)
+        return self._post
+
     def dispatch(self, request, *args, **kwargs):
-        instance = get_object_or_404(Post, pk=kwargs['post_pk'])
-        if instance.author != request.user:
+        instance = self.get_object()
+        if instance.author_id != request.user.pk:
             return redirect('blog:post_detail', instance.pk)
         return super().dispatch(request, *args, **kwargs)
 
 
+def comment_author_required(view):
+    """Загрузить комментарий один раз и пустить к нему только автора."""
+    @wraps(view)
+    def wrapper(request, post_pk, comment_pk):
+        comment = get_comment_instance(request, post_pk, comment_pk)
+        if comment.author_id != request.user.pk:
+            return redirect('blog:post_detail', post_pk=post_pk)
+        return view(request, comment)
+    return wrapper
+
+
+@method_decorator(cache_page_with_holes, name='dispatch')
 class PostListView(ListView):
     model = Post
     template_name = 'blog/index.html'
     paginate_by = settings.POSTS_PER_PAGE
-    queryset = get_base_query()
+
+    def get_queryset(self):
+        return get_feed_query()
+
+    def paginate_queryset(self, queryset, page_size):
+        page_obj = get_page_obj(self.request, queryset, 'index')
+        return (page_obj.paginator, page_obj, page_obj.object_list,
+                page_obj.has_other_pages())
 
 
+@method_decorator(count_post_view, name='dispatch')
+@method_decorator(cache_page_with_holes, name='dispatch')
 class PostDetailView(DetailView):
     model = Post
     template_name = 'blog/detail.html'
@@ -58,19 +104,21 @@ class PostDetailView(DetailView):
 
     def get_object(self):
         post = super().get_object()
-        if (post.author != self.request.user
-           and (not post.is_published
-                or not post.category.is_published
-                or not post.pub_date <= timezone.now())):
-            raise Http404()
+        if not post.is_visible:
+            if post.author != self.request.user:
+                raise Http404()
+            exclude_from_page_cache(self.request)
         return post
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         context['form'] = CommentForm()
-        context['comments'] = (
-            self.object.comments.select_related('author')
-        )
+        context['comments'] = get_comments_page(self.request, self.object)
+        add_version_dependencies(self.request, {
+            *card_dependencies(self.object),
+            *(card_version_key('user', comment.author_id)
+              for comment in context['comments']),
+        })
         return context
 
 
@@ -94,14 +142,11 @@ class PostDeleteView(LoginRequiredMixin, PostMixin, PostEditMixin, DeleteView):
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        context['form'] = PostForm(
-            instance=get_object_or_404(
-                Post, pk=self.kwargs['post_pk']
-            )
-        )
+        context['form'] = PostForm(instance=self.object)
         return context
 
 
+@cache_page_with_holes
 def category_posts(request, category_slug):
     template_name = 'blog/category.html'
     category = get_object_or_404(
@@ -109,34 +154,60 @@ def category_posts(request, category_slug):
         is_published=True,
         slug=category_slug,
     )
-    post_list = get_base_query().filter(
-        category__slug=category_slug
+    add_version_dependencies(
+        request, [card_version_key('category', category.pk)]
     )
-    page_obj = get_page_obj(request, post_list)
+    post_list = get_feed_query(category=category)
+    page_obj = get_page_obj(request, post_list, f'category:{category.pk}')
     context = {'category': category, 'page_obj': page_obj}
     return render(request, template_name, context)
 
 
+def search(request):
+    """Поиск по публикациям: самые подходящие первыми.
+
+    Порядок задаёт ранг полнотекстового индекса, а не поля модели, поэтому
+    здесь обычная постраничная навигация по ?page= вместо курсоров.
+    """
+    query = request.GET.get('q', '').strip()
+    page_obj = None
+    if query:
+        paginator = Paginator(
+            rank_matching(get_feed_query(), query), settings.POSTS_PER_PAGE
+        )
+        page_obj = paginator.get_page(request.GET.get('page'))
+        attach_card_versions(page_obj.object_list)
+    context = {'query': query, 'page_obj': page_obj}
+    return render_with_holes(request, 'blog/search.html', context)
+
+
+@cache_page_with_holes
 def user_detail(request, post_author):
     template_name = 'blog/profile.html'
     profile = get_object_or_404(User, username=post_author)
-    if profile == request.user:
-        post_list = profile.posts.filter(
-            author__username=post_author
-        ).annotate(
-            comment_count=Count('comments')
-        ).order_by(
-            '-pub_date', 'title'
-        )
-    else:
-        post_list = get_base_query().filter(
-            author=profile
-        )
-    page_obj = get_page_obj(request, post_list)
+    is_owner = profile == request.user
+    if is_owner:
+        exclude_from_page_cache(request)
+    add_version_dependencies(request, [card_version_key('user', profile.pk)])
+    post_list = get_feed_query(author=profile, only_visible=not is_owner)
+    page_obj = get_page_obj(
+        request, post_list, f'author:{profile.pk}:{int(is_owner)}'
+    )
     context = {'profile': profile, 'page_obj': page_obj}
     return render(request, template_name, context)
 
 
+def post_comments(request, post_pk):
+    post = get_object_or_404(
+        Post.objects.only('author_id', 'is_visible', 'comment_count'),
+        pk=post_pk,
+    )
+    if post.author_id != request.user.pk and not post.is_visible:
+        raise Http404()
+    context = {'post': post, 'comments': get_comments_page(request, post)}
+    return render(request, 'includes/comment_list.html', context)
+
+
 @login_required
 def user_edit(request):
     form = UpdateUserForm(request.POST or None, instance=request.user)
@@ -155,30 +226,28 @@ def add_comment(request, post_pk):
         comment = form.save(commit=False)
         comment.author = request.user
         comment.post = post
-        comment.save()
+        with transaction.atomic():
+            comment.save()
     return redirect('blog:post_detail', post_pk=post_pk)
 
 
 @login_required
-def edit_comment(request, post_pk, comment_pk):
-    instance = get_comment_instance(request, post_pk, comment_pk)
-    if instance.author != request.user:
-        return redirect('blog:post_detail', post_pk=post_pk)
+@comment_author_required
+def edit_comment(request, instance):
     form = CommentForm(request.POST or None, instance=instance)
     context = {'form': form, 'comment': instance}
     if form.is_valid():
         form.save()
-        return redirect('blog:post_detail', post_pk=post_pk)
+        return redirect('blog:post_detail', post_pk=instance.post_id)
     return render(request, 'blog/comment.html', context)
 
 
 @login_required
-def delete_comment(request, post_pk, comment_pk):
-    instance = get_comment_instance(request, post_pk, comment_pk)
-    if instance.author != request.user:
-        return redirect('blog:post_detail', post_pk=post_pk)
+@comment_author_required
+def delete_comment(request, instance):
     context = {'comment': instance}
     if request.method == 'POST':
-        instance.delete()
-        return redirect('blog:post_detail', post_pk=post_pk)
+        with transaction.atomic():
+            instance.delete()
+        return redirect('blog:post_detail', post_pk=instance.post_id)
     return render(request, 'blog/comment.html', context)
@@ -1,11 +1,48 @@
+import tempfile
 from pathlib import Path
 
+from core.static import static_lazy
+
 BASE_DIR = Path(__file__).resolve().parent.parent
 
 MEDIA_ROOT = BASE_DIR / 'media'
 
+MEDIA_URL = '/media/'
+
+# Кэширование файлов без хэша содержимого в имени, в секундах.
+MEDIA_CACHE_MAX_AGE = 60 * 60
+
+# 'x-accel-redirect' (nginx) или 'x-sendfile' (Apache, lighttpd): байты
+# файлов отдаёт фронтенд-сервер. Для nginx MEDIA_ACCEL_PREFIX — internal
+# location, смотрящий в MEDIA_ROOT.
+MEDIA_ACCEL = None
+
+MEDIA_ACCEL_PREFIX = '/protected-media/'
+
 POSTS_PER_PAGE = 10
 
+COMMENTS_PER_PAGE = 20
+
+VIEW_COUNT_FLUSH_INTERVAL = 10
+
+VIEW_COUNT_FLUSH_HITS = 100
+
+PAGINATION_ON_EACH_SIDE = 2
+
+FEED_COUNT_CACHE_TIMEOUT = 60 * 60
+
+PAGE_CACHE_TIMEOUT = 60 * 10
+
+POST_CARD_CACHE_TIMEOUT = 60 * 60 * 24
+
+POST_IMAGE_WIDTHS = (320, 640, 960, 1280)
+
+POST_IMAGE_MAX_SIZE = 2048
+
+IMAGE_JOB_TIMEOUT = 60 * 10
+
+IMAGE_JOB_ATTEMPTS = 3
+
 EMAIL_BACKEND = 'django.core.mail.backends.filebased.EmailBackend'
 
 EMAIL_FILE_PATH = BASE_DIR / 'sent_emails'
@@ -76,6 +113,27 @@ DATABASES = {
     }
 }
 
+# Версии лент и карточек и счётчики просмотров общие для веб-процессов
+# и фоновых команд (publish_scheduled, process_images), поэтому кэш
+# default не может жить в памяти одного процесса. Файловый кэш работает
+# в пределах одного сервера; для нескольких серверов нужен Memcached
+# (django.core.cache.backends.memcached.PyMemcacheCache).
+# Страницы и карточки ищутся по ключам с версиями и не устаревают, так
+# что их можно держать в памяти каждого процесса (кэш pages).
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': Path(tempfile.gettempdir()) / 'blogicum-cache',
+        'TIMEOUT': None,
+        'OPTIONS': {'MAX_ENTRIES': 10000},
+    },
+    'pages': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'blogicum-pages',
+        'OPTIONS': {'MAX_ENTRIES': 5000},
+    },
+}
+
 AUTH_PASSWORD_VALIDATORS = [
     {
         'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator',
@@ -107,6 +165,15 @@ STATICFILES_DIRS = [
     BASE_DIR / 'static_dev',
 ]
 
+STATIC_ROOT = BASE_DIR / 'static'
+
+# collectstatic добавляет в имена хэш содержимого и пишет .gz/.br копии.
+STATICFILES_STORAGE = 'core.storage.CompressedManifestStaticFilesStorage'
+
+BOOTSTRAP5 = {
+    'css_url': {'url': static_lazy('css/bootstrap.min.css')},
+}
+
 INTERNAL_IPS = [
     '127.0.0.1',
 ]
@@ -0,0 +1,200 @@
+import mimetypes
+import os
+import re
+import stat
+from urllib.parse import quote
+
+from django.conf import settings
+from django.core.exceptions import SuspiciousFileOperation
+from django.http import (FileResponse, Http404, HttpResponse,
+                         StreamingHttpResponse)
+from django.utils._os import safe_join
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, parse_http_date_safe
+from django.views.decorators.http import require_safe
+
+# Имена с хэшем содержимого (photo.<12 hex>.640w.webp) не меняются.
+HASHED_NAME_RE = re.compile(r'\.[0-9a-f]{12}\.')
+
+RANGE_RE = re.compile(r'^\s*bytes=(\d*)-(\d*)\s*$')
+
+IMMUTABLE_MAX_AGE = 60 * 60 * 24 * 365
+
+CHUNK_SIZE = 64 * 1024
+
+EXTRA_TYPES = {'.avif': 'image/avif', '.webp': 'image/webp'}
+
+
+MEDIA_PUBLIC = 'public'
+
+MEDIA_PRIVATE = 'private'
+
+_guards = {}
+
+
+class RangeNotSatisfiable(Exception):
+    pass
+
+
+def register_media_guard(prefix):
+    """Зарегистрировать проверку доступа к файлам каталога prefix.
+
+    Функция получает запрос и имя файла относительно MEDIA_ROOT и
+    возвращает MEDIA_PUBLIC, MEDIA_PRIVATE (файл отдаётся только этому
+    пользователю и не кэшируется общими кэшами) или None — файла нет.
+    """
+    def decorator(func):
+        _guards[prefix] = func
+        return func
+    return decorator
+
+
+def get_media_access(request, name):
+    for prefix, guard in _guards.items():
+        if name.startswith(prefix):
+            return guard(request, name)
+    return MEDIA_PUBLIC
+
+
+def parse_range(header, size):
+    """Границы одного диапазона из заголовка Range или None.
+
+    Непонятный или составной диапазон игнорируется, и файл отдаётся
+    целиком, как разрешает RFC 7233.
+    """
+    match = RANGE_RE.match(header)
+    if not match or match.groups() == ('', ''):
+        return None
+    start, end = match.groups()
+    if not start:
+        suffix = int(end)
+        if not suffix or not size:
+            raise RangeNotSatisfiable
+        return max(size - suffix, 0), size - 1
+    start = int(start)
+    if end and int(end) < start:
+        return None
+    if start >= size:
+        raise RangeNotSatisfiable
+    return start, min(int(end), size - 1) if end else size - 1
+
+
+def if_range_matches(request, etag, mtime):
+    if_range = request.META.get('HTTP_IF_RANGE')
+    if if_range is None:
+        return True
+    if if_range.startswith(('"', 'W/')):
+        return if_range == etag
+    return parse_http_date_safe(if_range) == mtime
+
+
+def iter_range(path, start, length):
+    with open(path, 'rb') as file:
+        file.seek(start)
+        while length > 0:
+            chunk = file.read(min(CHUNK_SIZE, length))
+            if not chunk:
+                break
+            length -= len(chunk)
+            yield chunk
+
+
+def accel_response(path, fullpath):
+    """Пустой ответ, тело которого отдаст фронтенд-сервер."""
+    response = HttpResponse()
+    if settings.MEDIA_ACCEL == 'x-accel-redirect':
+        response['X-Accel-Redirect'] = quote(
+            settings.MEDIA_ACCEL_PREFIX + path
+        )
+    else:
+        response['X-Sendfile'] = str(fullpath)
+    return response
+
+
+def file_response(request, path, fullpath, size, etag, mtime):
+    if settings.MEDIA_ACCEL:
+        return accel_response(path, fullpath)
+    byte_range = None
+    if 'HTTP_RANGE' in request.META and if_range_matches(
+        request, etag, mtime
+    ):
+        try:
+            byte_range = parse_range(request.META['HTTP_RANGE'], size)
+        except RangeNotSatisfiable:
+            response = HttpResponse(status=416)
+            response['Content-Range'] = f'bytes */{size}'
+            return response
+    if byte_range is None:
+        response = FileResponse(open(fullpath, 'rb'))
+    else:
+        start, end = byte_range
+        response = StreamingHttpResponse(
+            iter_range(fullpath, start, end - start + 1), status=206
+        )
+        response['Content-Length'] = end - start + 1
+        response['Content-Range'] = f'bytes {start}-{end}/{size}'
+    response['Accept-Ranges'] = 'bytes'
+    return response
+
+
+def find_media_file(request, path):
+    """Полный путь и os.stat файла, доступного запросу; иначе Http404."""
+    try:
+        fullpath = safe_join(settings.MEDIA_ROOT, path)
+    except (SuspiciousFileOperation, ValueError):
+        raise Http404
+    name = os.path.relpath(fullpath, settings.MEDIA_ROOT).replace(os.sep, '/')
+    access = get_media_access(request, name)
+    if access is None:
+        raise Http404
+    try:
+        file_stat = os.stat(fullpath)
+    except (OSError, ValueError):
+        raise Http404
+    if not stat.S_ISREG(file_stat.st_mode):
+        raise Http404
+    return fullpath, file_stat, access
+
+
+def set_cache_control(response, path, access):
+    if access == MEDIA_PRIVATE:
+        response['Cache-Control'] = 'private, no-cache'
+        response['Vary'] = 'Cookie'
+        return
+    max_age = (IMMUTABLE_MAX_AGE if HASHED_NAME_RE.search(path)
+               else settings.MEDIA_CACHE_MAX_AGE)
+    response['Cache-Control'] = f'public, max-age={max_age}' + (
+        ', immutable' if max_age == IMMUTABLE_MAX_AGE else ''
+    )
+
+
+@require_safe
+def serve_media(request, path):
+    """Отдать загруженный файл из MEDIA_ROOT.
+
+    Поддерживает условные запросы и Range; с MEDIA_ACCEL сами байты
+    отдаёт фронтенд-сервер по X-Accel-Redirect или X-Sendfile. Доступ
+    к каталогам с личными файлами проверяют функции, зарегистрированные
+    через register_media_guard().
+    """
+    fullpath, file_stat, access = find_media_file(request, path)
+    size = file_stat.st_size
+    mtime = int(file_stat.st_mtime)
+    etag = f'"{file_stat.st_mtime_ns:x}-{size:x}"'
+    response = get_conditional_response(
+        request, etag=etag, last_modified=mtime
+    )
+    if response is None:
+        response = file_response(request, path, fullpath, size, etag, mtime)
+    if response.status_code in (200, 206, 304):
+        content_type, encoding = mimetypes.guess_type(path)
+        if response.status_code != 304:
+            response['Content-Type'] = content_type or EXTRA_TYPES.get(
+                os.path.splitext(path)[1].lower(), 'application/octet-stream'
+            )
+            if encoding:
+                response['Content-Encoding'] = encoding
+        response['ETag'] = etag
+        response['Last-Modified'] = http_date(mtime)
+        set_cache_control(response, path, access)
+    return response
@@ -0,0 +1,195 @@
+import hashlib
+import json
+import re
+from functools import wraps
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.core.cache import cache, caches
+from django.http import HttpResponse
+from django.template.loader import render_to_string
+from django.utils.cache import get_conditional_response
+from django.utils.connection import ConnectionProxy
+from django.utils.http import http_date, quote_etag
+
+PAGE_CACHE_KEY = 'core:page:{}'
+# Параметры запроса, от которых зависят кэшируемые страницы.
+PAGE_CACHE_PARAMS = frozenset({'after', 'before', 'last'})
+HOLE_MARKER = '<!--hole {}-->'
+HOLE_RE = re.compile(r'<!--hole (\{.*?\})-->')
+
+# Кэш готовых страниц и карточек; версии читаются из кэша default.
+page_cache = ConnectionProxy(caches, 'pages')
+
+_holes = {}
+
+
+def register_hole(name):
+    """Зарегистрировать функцию, которая рисует «дырку» для пользователя.
+
+    Функция получает запрос и именованные аргументы из тега {% hole %}
+    и возвращает HTML; страница кэшируется без этих фрагментов.
+    """
+    def decorator(func):
+        _holes[name] = func
+        return func
+    return decorator
+
+
+@register_hole('header')
+def render_header(request):
+    return render_to_string('includes/header.html', request=request)
+
+
+def render_hole(request, name, kwargs):
+    if getattr(request, 'page_cache_holes', False):
+        return HOLE_MARKER.format(
+            json.dumps({'name': name, 'kwargs': kwargs}, sort_keys=True)
+        )
+    return _holes[name](request, **kwargs)
+
+
+def fill_holes(request, content):
+    """Дорисовать «дырки» страницы.
+
+    Все дырки страницы доступны функциям в request.page_holes, чтобы
+    однотипные фрагменты можно было загрузить одним запросом.
+    """
+    request.page_holes = [
+        json.loads(hole) for hole in HOLE_RE.findall(content)
+    ]
+
+    def replace(match):
+        hole = json.loads(match.group(1))
+        return _holes[hole['name']](request, **hole['kwargs'])
+    return HOLE_RE.sub(replace, content)
+
+
+def render_with_holes(request, template_name, context):
+    """Отрисовать некэшируемую страницу так же, как кэшируемые.
+
+    Фрагменты в {% cache %} общие для всех страниц, поэтому и здесь
+    персональные данные должны попасть в них только как «дырки».
+    """
+    request.page_cache_holes = True
+    try:
+        content = render_to_string(template_name, context, request=request)
+    finally:
+        request.page_cache_holes = False
+    return HttpResponse(fill_holes(request, content))
+
+
+def add_page_dependencies(request, keys):
+    """Добавить ключи версий, от которых зависит кэш текущей страницы."""
+    if hasattr(request, 'page_dependencies'):
+        request.page_dependencies.update(keys)
+
+
+def exclude_from_page_cache(request):
+    """Страница отличается от той, что видит аноним: не кэшировать её."""
+    request.page_cache_skip = True
+
+
+def _is_fresh(entry):
+    versions = entry['versions']
+    return cache.get_many(list(versions)) == versions
+
+
+def page_cache_key(request):
+    """Ключ страницы в кэше; None, если в запросе есть чужие параметры.
+
+    Ключ строится только из параметров PAGE_CACHE_PARAMS, чтобы
+    произвольные строки запроса не заполняли кэш копиями одной страницы.
+    """
+    if not PAGE_CACHE_PARAMS.issuperset(request.GET):
+        return None
+    query = urlencode(sorted(request.GET.items()))
+    return PAGE_CACHE_KEY.format(
+        hashlib.md5(f'{request.path}?{query}'.encode()).hexdigest()
+    )
+
+
+def page_validators(request, versions):
+    """ETag и Last-Modified страницы по версиям, от которых она зависит.
+
+    Версии — метки времени изменений в наносекундах, так что самая
+    поздняя из них и есть время последнего изменения страницы. ETag
+    учитывает пользователя: «дырки» у всех разные.
+    """
+    digest = hashlib.md5(
+        json.dumps(sorted(versions.items())).encode()
+    ).hexdigest()
+    etag = quote_etag(f'{digest}-{request.user.pk or 0}')
+    return etag, max(versions.values()) // 10 ** 9
+
+
+def render_page(view, request, *args, **kwargs):
+    """Отрисовать страницу с «дырками»; вернуть (запись для кэша, ответ).
+
+    Записи нет, если ответ не кэшируется: ошибка или потоковый ответ.
+    """
+    request.page_cache_holes = True
+    request.page_dependencies = set()
+    try:
+        response = view(request, *args, **kwargs)
+        if hasattr(response, 'render'):
+            response.render()
+    finally:
+        # Страницы ошибок рисуются уже после выхода из view.
+        request.page_cache_holes = False
+    if response.status_code != 200 or response.streaming:
+        return None, response
+    return {
+        'content': response.content.decode(response.charset),
+        'content_type': response['Content-Type'],
+        'versions': cache.get_many(list(request.page_dependencies)),
+    }, response
+
+
+def page_response(request, entry):
+    """Ответ из записи кэша: 304 по валидаторам или страница с «дырками»."""
+    etag = last_modified = None
+    if entry['versions']:
+        etag, last_modified = page_validators(request, entry['versions'])
+    response = get_conditional_response(
+        request, etag=etag, last_modified=last_modified
+    )
+    if response is None:
+        response = HttpResponse(
+            fill_holes(request, entry['content']),
+            content_type=entry['content_type'],
+        )
+    if etag is not None:
+        response['ETag'] = etag
+        response['Last-Modified'] = http_date(last_modified)
+    return response
+
+
+def cache_page_with_holes(view):
+    """Кэшировать страницу целиком, кроме персональных «дырок».
+
+    Тело страницы одинаково для всех пользователей и хранится в кэше
+    вместе с версиями, от которых оно зависит; при несовпадении хотя бы
+    одной версии страница рисуется заново. Персональные фрагменты
+    (шапка, форма комментария, кнопки автора) дорисовываются на
+    каждый запрос через fill_holes(). По тем же версиям вычисляются
+    ETag и Last-Modified, так что условный запрос получает 304 без
+    отрисовки страницы.
+    """
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        if request.method not in ('GET', 'HEAD'):
+            return view(request, *args, **kwargs)
+        key = page_cache_key(request)
+        entry = page_cache.get(key) if key is not None else None
+        if entry is None or not _is_fresh(entry):
+            entry, response = render_page(view, request, *args, **kwargs)
+            if entry is None:
+                return response
+            if (key is not None and settings.PAGE_CACHE_TIMEOUT
+                    and not getattr(request, 'page_cache_skip', False)
+                    and len(entry['versions']) == len(
+                        request.page_dependencies)):
+                page_cache.set(key, entry, settings.PAGE_CACHE_TIMEOUT)
+        return page_response(request, entry)
+    return wrapper
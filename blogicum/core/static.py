@@ -0,0 +1,11 @@
+from django.utils.functional import lazy
+
+
+def _static(path):
+    from django.templatetags.static import static
+    return static(path)
+
+
+# Адрес статики, который вычисляется при выводе, а не при загрузке
+# настроек: хранилище с манифестом ещё не готово в settings.py.
+static_lazy = lazy(_static, str)
@@ -0,0 +1,19 @@
+from django import template
+from django.conf import settings
+from django.utils.safestring import mark_safe
+
+from core.page_cache import render_hole
+
+register = template.Library()
+
+
+@register.simple_tag(takes_context=True)
+def hole(context, name, **kwargs):
+    """Персональный фрагмент страницы, который не попадает в кэш."""
+    return mark_safe(render_hole(context['request'], name, kwargs))
+
+
+@register.simple_tag
+def cache_timeout(name):
+    """Время жизни фрагмента для {% cache %} из настройки name."""
+    return getattr(settings, name)
@@ -1,13 +1,19 @@
 from django.urls import path
 from django.views.generic.base import TemplateView
 
+from core.page_cache import cache_page_with_holes
+
 app_name = 'pages'
 
 urlpatterns = [
     path('about/',
-         TemplateView.as_view(template_name="pages/about.html"),
+         cache_page_with_holes(
+             TemplateView.as_view(template_name="pages/about.html")
+         ),
          name='about'),
     path('rules/',
-         TemplateView.as_view(template_name="pages/rules.html"),
+         cache_page_with_holes(
+             TemplateView.as_view(template_name="pages/rules.html")
+         ),
          name='rules'),
 ]
@@ -41,6 +41,43 @@ def enable_debug_false():
         yield
 
 
+@pytest.fixture(autouse=True)
+def drop_pending_views():
+    # Буфер просмотров живёт в памяти процесса и пережил бы тестовую БД.
+    from blog.counters import view_counter
+
+    view_counter.take_pending()
+    yield
+    view_counter.take_pending()
+
+
+@pytest.fixture(autouse=True)
+def use_locmem_cache():
+    # Файловый кэш из настроек пережил бы тестовую БД и делился бы с
+    # запущенным сервером; каждому запуску тестов — свой кэш в памяти.
+    from django.core.cache import caches
+
+    with override_settings(CACHES={
+        "default": {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        },
+        "pages": {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+            "LOCATION": "pages",
+        },
+    }):
+        yield
+        caches["pages"].clear()
+
+
+@pytest.fixture(autouse=True)
+def disable_page_cache():
+    # Страницы из кэша отдаются без контекста шаблона, который проверяют
+    # тесты; сам кэш страниц проверяется в test_page_cache.py.
+    with override_settings(PAGE_CACHE_TIMEOUT=0):
+        yield
+
+
 class SafeImportFromContextManager:
     def __init__(
             self,
@@ -0,0 +1,69 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils.html import escape
+
+pytestmark = [pytest.mark.django_db]
+
+
+@pytest.mark.parametrize("field", ["category", "location"])
+def test_change_page_lists_posts_by_page(
+        mixer, admin_client, user, published_category, published_location,
+        field
+):
+    owner = {"category": published_category,
+             "location": published_location}[field]
+    mixer.cycle(60).blend(
+        "blog.Post", author=user, category=published_category,
+        location=published_location,
+    )
+    url = f"/admin/blog/{field}/{owner.pk}/change/"
+    with CaptureQueriesContext(connection) as context:
+        response = admin_client.get(url)
+    assert response.status_code == 200
+    page = response.context["post_page"]
+    assert page.paginator.count == 60
+    assert len(page.object_list) == 50
+    assert b"posts-0-title" not in response.content, (
+        "Убедитесь, что на странице категории и местоположения нет"
+        " встроенных форм публикаций."
+    )
+    post_selects = [
+        query["sql"] for query in context.captured_queries
+        if 'FROM "blog_post"' in query["sql"]
+    ]
+    assert len(post_selects) <= 2
+    assert not any('"blog_post"."text"' in sql for sql in post_selects)
+    response = admin_client.get(url, {"posts_page": 2})
+    assert len(response.context["post_page"].object_list) == 10
+
+
+def test_post_changelist_editable_relations_are_cheap(
+        mixer, admin_client, user, published_category, published_locations
+):
+    mixer.cycle(20).blend("blog.Category", is_published=True)
+    mixer.cycle(20).blend(
+        "blog.Post", author=user, category=published_category,
+        location=mixer.sequence(*published_locations),
+    )
+    with CaptureQueriesContext(connection) as context:
+        response = admin_client.get("/admin/blog/post/")
+    assert response.status_code == 200
+    content = response.content.decode()
+    selected = f"selected>{escape(published_category.title)}</option>"
+    assert content.count(selected) == 20
+    assert content.count("<option") < 20 * 4, (
+        "Убедитесь, что в списке публикаций категории и местоположения"
+        " выбираются автокомплитом, а не полным списком в каждой строке."
+    )
+    relation_selects = [
+        query["sql"] for query in context.captured_queries
+        if query["sql"].startswith("SELECT") and (
+            'FROM "blog_category"' in query["sql"]
+            or 'FROM "blog_location"' in query["sql"]
+        )
+    ]
+    assert len(relation_selects) <= 2, (
+        "Убедитесь, что выбранные категории и местоположения берутся из"
+        " list_select_related, а не загружаются для каждой строки."
+    )
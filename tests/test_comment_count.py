@@ -0,0 +1,74 @@
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+
+from blog.models import Comment, Post
+
+pytestmark = [pytest.mark.django_db]
+
+
+def test_comment_count_follows_comments(
+        mixer, another_user, post_with_published_location
+):
+    post = post_with_published_location
+    comments = mixer.cycle(3).blend("blog.Comment", post=post)
+    mixer.blend("blog.Comment", post=post, author=another_user)
+    post.refresh_from_db()
+    assert post.comment_count == 4, (
+        "Убедитесь, что при создании комментария увеличивается счётчик"
+        " `comment_count` публикации."
+    )
+
+    comments[0].delete()
+    another_user.delete()
+    post.refresh_from_db()
+    assert post.comment_count == 2, (
+        "Убедитесь, что при удалении комментария, в том числе каскадном,"
+        " уменьшается счётчик `comment_count` публикации."
+    )
+
+
+def test_recount_comments_command(mixer, post_with_published_location):
+    post = post_with_published_location
+    mixer.cycle(2).blend("blog.Comment", post=post)
+    type(post).objects.filter(pk=post.pk).update(comment_count=100)
+
+    call_command("recount_comments", stdout=StringIO())
+
+    post.refresh_from_db()
+    assert post.comment_count == 2, (
+        "Убедитесь, что команда `recount_comments` пересчитывает счётчик"
+        " комментариев по таблице комментариев."
+    )
+
+
+def test_comment_count_follows_moved_comment(
+        mixer, post_with_published_location, post_with_another_category
+):
+    source, target = post_with_published_location, post_with_another_category
+    mixer.blend("blog.Comment", post=source)
+    comment = Comment.objects.get()
+    comment.post = target
+    comment.save()
+    counts = dict(Post.objects.values_list("pk", "comment_count"))
+    assert counts == {source.pk: 0, target.pk: 1}, (
+        "Убедитесь, что при переносе комментария к другой публикации"
+        " счётчики `comment_count` обеих публикаций обновляются."
+    )
+
+
+def test_comment_count_after_loaddata(
+        mixer, tmp_path, post_with_published_location
+):
+    post = post_with_published_location
+    mixer.cycle(2).blend("blog.Comment", post=post)
+    fixture = tmp_path / "comments.json"
+    call_command("dumpdata", "blog.comment", output=fixture)
+    Comment.objects.all().delete()
+    call_command("loaddata", fixture, stdout=StringIO())
+    post.refresh_from_db()
+    assert post.comment_count == 2, (
+        "Убедитесь, что счётчик `comment_count` учитывает комментарии,"
+        " загруженные командой `loaddata`."
+    )
@@ -0,0 +1,88 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext, override_settings
+
+pytestmark = [pytest.mark.django_db]
+
+COMMENTS_PER_PAGE = 3
+
+
+@pytest.fixture(autouse=True)
+def small_comment_pages():
+    with override_settings(COMMENTS_PER_PAGE=COMMENTS_PER_PAGE):
+        yield
+
+
+@pytest.fixture
+def many_comments(mixer, post_with_published_location):
+    return mixer.cycle(COMMENTS_PER_PAGE * 2 + 1).blend(
+        "blog.Comment", post=post_with_published_location
+    )
+
+
+def test_detail_shows_first_comment_page(
+        client, post_with_published_location, many_comments
+):
+    url = f"/posts/{post_with_published_location.id}/"
+    with CaptureQueriesContext(connection) as context:
+        response = client.get(url)
+    comments = response.context["comments"]
+    assert [c.id for c in comments] == [
+        c.id for c in many_comments[:COMMENTS_PER_PAGE]
+    ], "Убедитесь, что на странице поста выводится первая страница комментариев."
+    assert comments.has_next()
+    assert not any(
+        "COUNT(" in query["sql"] for query in context.captured_queries
+    ), "Убедитесь, что число комментариев берётся из счётчика поста."
+    assert f"Комментарии ({len(many_comments)})" in response.content.decode()
+
+
+def test_comments_fragment_loads_next_pages(
+        client, post_with_published_location, many_comments
+):
+    post = post_with_published_location
+    first = client.get(f"/posts/{post.id}/").context["comments"]
+    seen = [c.id for c in first]
+    cursor = first.next_cursor
+    while cursor:
+        response = client.get(f"/posts/{post.id}/comments/", {"after": cursor})
+        assert response.status_code == 200
+        assert "<html" not in response.content.decode(), (
+            "Убедитесь, что `posts/<post_pk>/comments/` возвращает только"
+            " фрагмент со списком комментариев."
+        )
+        page = response.context["comments"]
+        seen += [c.id for c in page]
+        cursor = page.next_cursor
+    assert seen == [c.id for c in many_comments], (
+        "Убедитесь, что подгрузка по курсору выводит каждый комментарий"
+        " ровно один раз по порядку."
+    )
+
+
+def test_comments_fragment_of_hidden_post(client, user_client, future_posts):
+    url = f"/posts/{future_posts[0].id}/comments/"
+    assert client.get(url).status_code == 404
+    assert user_client.get(url).status_code == 200
+
+
+def test_comments_fragment_reads_only_needed_fields(
+        user_client, post_with_published_location, many_comments
+):
+    url = f"/posts/{post_with_published_location.id}/comments/"
+    with CaptureQueriesContext(connection) as context:
+        response = user_client.get(url)
+    assert response.status_code == 200
+    post_queries = [
+        query["sql"] for query in context.captured_queries
+        if query["sql"].startswith('SELECT "blog_post"')
+    ]
+    assert len(post_queries) == 1 and '"blog_post"."text"' not in (
+        post_queries[0]
+    ), (
+        "Убедитесь, что фрагмент комментариев не загружает текст публикации."
+    )
+    assert len(context.captured_queries) == 4, (
+        "Убедитесь, что для проверки автора публикации не выполняется"
+        " отдельный запрос."
+    )
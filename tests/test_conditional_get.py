@@ -0,0 +1,76 @@
+import pytest
+
+pytestmark = [pytest.mark.django_db]
+
+
+def _revalidate(client, url, response):
+    return client.get(url, HTTP_IF_NONE_MATCH=response["ETag"])
+
+
+@pytest.mark.parametrize(
+    "get_url",
+    [
+        lambda post: "/",
+        lambda post: f"/category/{post.category.slug}/",
+        lambda post: f"/profile/{post.author.username}/",
+        lambda post: f"/posts/{post.id}/",
+    ],
+    ids=["index", "category", "profile", "detail"],
+)
+def test_conditional_get(
+        mixer, client, user_client, post_with_published_location, get_url
+):
+    post = post_with_published_location
+    url = get_url(post)
+    response = client.get(url)
+    assert response.status_code == 200
+    assert response.has_header("ETag") and response.has_header(
+        "Last-Modified"
+    ), "Убедитесь, что страница отдаёт заголовки ETag и Last-Modified."
+
+    not_modified = _revalidate(client, url, response)
+    assert not_modified.status_code == 304, (
+        "Убедитесь, что на условный запрос без изменений возвращается 304."
+    )
+    assert _revalidate(user_client, url, response).status_code == 200, (
+        "Убедитесь, что ETag различается для разных пользователей."
+    )
+
+    comment = mixer.blend("blog.Comment", post=post)
+    response = client.get(url)
+    comment.text = "Исправленный комментарий"
+    comment.save()
+    assert _revalidate(client, url, response).status_code == 200, (
+        "Убедитесь, что ETag меняется при изменении комментариев к посту."
+    )
+
+
+@pytest.mark.parametrize(
+    "get_url",
+    [
+        lambda post: f"/category/{post.category.slug}/",
+        lambda post: f"/posts/{post.id}/",
+    ],
+    ids=["category", "detail"],
+)
+def test_validators_follow_shown_content_only(
+        mixer, client, post_with_published_location,
+        post_with_another_category, get_url
+):
+    url = get_url(post_with_published_location)
+    response = client.get(url)
+    mixer.blend("blog.Comment", post=post_with_another_category)
+    assert _revalidate(client, url, response).status_code == 304, (
+        "Убедитесь, что комментарий к посту, которого нет на странице,"
+        " не меняет её ETag."
+    )
+
+
+def test_hidden_post_has_no_etag(client, future_posts):
+    response = client.get(f"/posts/{future_posts[0].id}/")
+    assert response.status_code == 404
+    assert "<!--hole" not in response.content.decode("utf-8")
+    assert not response.has_header("ETag"), (
+        "Убедитесь, что страница 404 не отдаёт ETag, иначе после публикации"
+        " поста клиент получит 304 вместо него."
+    )
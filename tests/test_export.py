@@ -0,0 +1,61 @@
+import csv
+import io
+import json
+from datetime import timedelta
+
+import pytest
+from django.core.management import call_command
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+
+from blog.models import Comment, Post
+
+pytestmark = [pytest.mark.django_db]
+
+
+def export(*args, **options):
+    out = io.StringIO()
+    call_command("export_blog", *args, stdout=out, **options)
+    return out.getvalue()
+
+
+def test_export_jsonl(post_with_published_location, comment_to_a_post):
+    records = [json.loads(line) for line in export().splitlines()]
+    models = [record["model"] for record in records]
+    assert models.count("blog.post") == Post.objects.count()
+    assert models.count("blog.comment") == Comment.objects.count()
+    post = next(r for r in records if r["model"] == "blog.post")
+    assert post["pk"] == post_with_published_location.pk
+    assert post["fields"]["author"] == post_with_published_location.author_id
+
+
+def test_export_since(mixer, user):
+    old = mixer.blend("blog.Post", author=user)
+    new = mixer.blend("blog.Post", author=user)
+    Post.objects.filter(pk=old.pk).update(
+        created_at=timezone.now() - timedelta(days=3)
+    )
+    since = (timezone.now() - timedelta(days=1)).date().isoformat()
+    records = [json.loads(line)
+               for line in export("blog.post", since=since).splitlines()]
+    assert [record["pk"] for record in records] == [new.pk], (
+        "Убедитесь, что `--since` выгружает только новые объекты."
+    )
+
+
+def test_export_csv(post_with_published_location):
+    rows = list(csv.reader(io.StringIO(export("blog.post", format="csv"))))
+    assert rows[0][:2] == ["pk", "is_published"]
+    assert len(rows) == 1 + Post.objects.count()
+
+
+def test_admin_export_streams(admin_client, post_with_published_location):
+    response = admin_client.post("/admin/blog/post/", {
+        "action": "export_jsonl",
+        "_selected_action": [post_with_published_location.pk],
+    })
+    assert isinstance(response, StreamingHttpResponse), (
+        "Убедитесь, что выгрузка из админки отдаётся потоком."
+    )
+    body = b"".join(response.streaming_content).decode()
+    assert json.loads(body)["pk"] == post_with_published_location.pk
@@ -0,0 +1,73 @@
+import pytest
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from conftest import N_PER_PAGE
+
+pytestmark = [pytest.mark.django_db]
+
+
+def _count_queries(client, url):
+    cache.clear()
+    with CaptureQueriesContext(connection) as context:
+        response = client.get(url)
+    assert response.status_code == 200
+    return len(context.captured_queries)
+
+
+def _blend_posts(mixer, count, author, category, location):
+    return mixer.cycle(count).blend(
+        "blog.Post",
+        author=author,
+        category=category,
+        location=location,
+        is_published=True,
+        pub_date=timezone.now(),
+    )
+
+
+@pytest.mark.parametrize(
+    "get_url",
+    [
+        lambda user, category: "/",
+        lambda user, category: f"/category/{category.slug}/",
+        lambda user, category: f"/profile/{user.username}/",
+    ],
+    ids=["index", "category", "profile"],
+)
+@pytest.mark.parametrize("as_owner", [False, True], ids=["guest", "owner"])
+def test_feed_query_count_is_constant(
+        mixer, client, user_client, user, published_category,
+        published_location, get_url, as_owner
+):
+    client = user_client if as_owner else client
+    url = get_url(user, published_category)
+    _blend_posts(mixer, 1, user, published_category, published_location)
+    single = _count_queries(client, url)
+
+    _blend_posts(
+        mixer, N_PER_PAGE, user, published_category, published_location
+    )
+    two_pages = _count_queries(client, url)
+    # Со второй страницей добавляется запрос курсоров для ссылок на
+    # следующие страницы, а когда их больше, чем ссылок в окне, — COUNT
+    # для номера последней страницы.
+    assert two_pages <= single + 1, (
+        "Убедитесь, что число запросов к БД при выводе ленты не зависит"
+        " от количества публикаций на странице."
+    )
+
+    _blend_posts(
+        mixer, N_PER_PAGE * 3, user, published_category, published_location
+    )
+    many_pages = _count_queries(client, url)
+    assert many_pages <= single + 2
+    _blend_posts(
+        mixer, N_PER_PAGE * 3, user, published_category, published_location
+    )
+    assert _count_queries(client, url) == many_pages, (
+        "Убедитесь, что число запросов к БД при выводе ленты не зависит"
+        " от количества страниц."
+    )
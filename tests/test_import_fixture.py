@@ -0,0 +1,146 @@
+import io
+import json
+from pathlib import Path
+
+import pytest
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import Group, Permission
+from django.core.management import call_command
+
+from blog.importing import FixtureImporter, iter_json_array
+from blog.models import Comment, Post
+
+pytestmark = [pytest.mark.django_db]
+
+User = get_user_model()
+
+FIXTURE = Path(__file__).resolve().parent.parent / "db.json"
+
+
+def test_iter_json_array_reads_in_chunks():
+    objects = [{"model": "blog.category", "pk": i, "fields": {"t": "ы" * i}}
+               for i in range(50)]
+    stream = io.StringIO(json.dumps(objects, ensure_ascii=False, indent=1))
+    assert list(iter_json_array(stream, read_size=7)) == objects, (
+        "Убедитесь, что JSON-массив фикстуры разбирается по кускам."
+    )
+
+
+def test_import_fixture_loads_db_json():
+    out = io.StringIO()
+    call_command("import_fixture", str(FIXTURE), batch_size=7, stdout=out)
+    fixture = json.loads(FIXTURE.read_text(encoding="utf-8"))
+    expected = sum(obj["model"] == "blog.post" for obj in fixture)
+    assert Post.objects.count() == expected, (
+        "Убедитесь, что команда `import_fixture` загружает все публикации"
+        " из фикстуры."
+    )
+    assert "blog.post: загружено" in out.getvalue()
+    assert not Post.objects.filter(excerpt="").exists(), (
+        "Убедитесь, что при импорте публикаций заполняется анонс."
+    )
+    assert Post.objects.filter(is_visible=True).exists(), (
+        "Убедитесь, что при импорте вычисляется видимость публикаций."
+    )
+
+
+def test_import_fixture_jsonl_comments(tmp_path, user, mixer):
+    post = mixer.blend("blog.Post", author=user)
+    records = [
+        {"model": "blog.comment", "pk": pk, "fields": {
+            "text": "Комментарий", "post": post_id, "author": user.pk,
+            "created_at": "2022-12-18T23:03:52Z", "is_published": True,
+        }}
+        for pk, post_id in ((1, post.pk), (2, post.pk), (3, post.pk + 100))
+    ]
+    path = tmp_path / "comments.jsonl"
+    path.write_text(
+        "\n".join(json.dumps(record) for record in records),
+        encoding="utf-8",
+    )
+    out = io.StringIO()
+    call_command("import_fixture", str(path), stdout=out)
+    assert Comment.objects.count() == 2, (
+        "Убедитесь, что комментарии к несуществующим публикациям пропускаются."
+    )
+    assert "пропущено без связанных объектов 1" in out.getvalue()
+    post.refresh_from_db()
+    assert post.comment_count == 2, (
+        "Убедитесь, что после импорта комментариев пересчитывается их"
+        " количество у публикаций."
+    )
+    assert Comment.objects.first().created_at.year == 2022, (
+        "Убедитесь, что импорт сохраняет дату создания комментария из"
+        " фикстуры."
+    )
+
+
+def test_deferred_rows_are_kept_on_disk(user, published_category):
+    importer = FixtureImporter(batch_size=2)
+    records = [
+        {"model": "blog.post", "pk": pk, "fields": {
+            "title": f"Пост {pk}", "text": "Текст", "author": 100,
+            "category": published_category.pk, "is_published": True,
+            "pub_date": "2022-12-18T23:03:52Z",
+        }}
+        for pk in range(1, 6)
+    ]
+
+    def stream():
+        yield from records
+        assert importer._deferred and all(
+            hasattr(deferred, "seek")
+            for deferred in importer._deferred.values()
+        ), (
+            "Убедитесь, что строки со ссылками на ещё не загруженные"
+            " объекты откладываются во временный файл, а не в память."
+        )
+        yield {"model": "auth.user", "pk": 100, "fields": {
+            "username": "late", "password": "!",
+        }}
+
+    importer.run(stream())
+    assert Post.objects.filter(author_id=100, is_visible=True).count() == 5
+
+
+def test_import_refreshes_only_new_posts(tmp_path, user, published_category,
+                                         post_with_published_location):
+    stale = post_with_published_location
+    Post.objects.filter(pk=stale.pk).update(is_visible=False)
+    record = {"model": "blog.post", "fields": {
+        "title": "Без ключа", "text": "Текст", "author": user.pk,
+        "category": published_category.pk, "is_published": True,
+        "pub_date": "2022-12-18T23:03:52Z",
+    }}
+    path = tmp_path / "posts.jsonl"
+    path.write_text(json.dumps(record), encoding="utf-8")
+    call_command("import_fixture", str(path), stdout=io.StringIO())
+    assert Post.objects.get(title="Без ключа").is_visible
+    assert not Post.objects.get(pk=stale.pk).is_visible, (
+        "Убедитесь, что импорт не пересчитывает видимость всех публикаций."
+    )
+
+
+def test_import_keeps_user_groups_and_permissions(tmp_path):
+    group = Group.objects.create(name="Редакторы")
+    permission = Permission.objects.get(codename="change_post")
+    records = [{"model": "auth.user", "pk": 50, "fields": {
+        "username": "editor", "password": "!",
+        "groups": [group.pk, group.pk + 100],
+        "user_permissions": [permission.pk],
+    }}]
+    path = tmp_path / "users.jsonl"
+    path.write_text(json.dumps(records[0]), encoding="utf-8")
+    out = io.StringIO()
+    call_command("import_fixture", str(path), stdout=out)
+    user = User.objects.get(pk=50)
+    assert list(user.groups.all()) == [group], (
+        "Убедитесь, что при импорте сохраняются группы пользователей."
+    )
+    assert list(user.user_permissions.all()) == [permission], (
+        "Убедитесь, что при импорте сохраняются права пользователей."
+    )
+    assert "не загружено связей многие-ко-многим 1" in out.getvalue(), (
+        "Убедитесь, что команда сообщает о связях с отсутствующими"
+        " объектами."
+    )
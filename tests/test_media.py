@@ -0,0 +1,120 @@
+import pytest
+
+pytestmark = [pytest.mark.django_db]
+
+CONTENT = bytes(range(256)) * 4
+
+
+@pytest.fixture
+def media_file(settings, tmp_path):
+    settings.MEDIA_ROOT = tmp_path
+    for directory in ("uploads", "post_images"):
+        (tmp_path / directory).mkdir()
+        (tmp_path / directory / "photo.jpg").write_bytes(CONTENT)
+    (tmp_path / "post_images" / "photo.0123456789ab.320w.webp").write_bytes(
+        CONTENT
+    )
+    return "/media/uploads/photo.jpg"
+
+
+def body(response):
+    return b"".join(response.streaming_content)
+
+
+def test_full_file(client, media_file):
+    response = client.get(media_file)
+    assert response.status_code == 200
+    assert body(response) == CONTENT
+    assert response["Content-Type"] == "image/jpeg"
+    assert response["Accept-Ranges"] == "bytes"
+    assert "immutable" not in response["Cache-Control"]
+
+
+@pytest.mark.parametrize("header, start, end", [
+    ("bytes=10-19", 10, 19),
+    ("bytes=1000-", 1000, 1023),
+    ("bytes=-24", 1000, 1023),
+    ("bytes=1000-5000", 1000, 1023),
+])
+def test_range(client, media_file, header, start, end):
+    response = client.get(media_file, HTTP_RANGE=header)
+    assert response.status_code == 206, (
+        "Убедитесь, что медиафайлы отдаются по частям по заголовку Range."
+    )
+    assert body(response) == CONTENT[start:end + 1]
+    assert response["Content-Range"] == f"bytes {start}-{end}/1024"
+    assert response["Content-Length"] == str(end - start + 1)
+
+
+def test_range_not_satisfiable(client, media_file):
+    response = client.get(media_file, HTTP_RANGE="bytes=5000-")
+    assert response.status_code == 416
+    assert response["Content-Range"] == "bytes */1024"
+
+
+def test_stale_if_range_returns_full_file(client, media_file):
+    response = client.get(
+        media_file, HTTP_RANGE="bytes=0-9", HTTP_IF_RANGE='"stale"'
+    )
+    assert response.status_code == 200
+
+
+def test_conditional_requests(client, media_file):
+    response = client.get(media_file)
+    etag, last_modified = response["ETag"], response["Last-Modified"]
+    assert client.get(
+        media_file, HTTP_IF_NONE_MATCH=etag
+    ).status_code == 304, "Убедитесь, что медиафайлы поддерживают ETag."
+    assert client.get(
+        media_file, HTTP_IF_MODIFIED_SINCE=last_modified
+    ).status_code == 304
+
+
+def test_hashed_names_are_immutable(client, media_file):
+    response = client.get("/media/post_images/photo.0123456789ab.320w.webp")
+    assert response["Content-Type"] == "image/webp"
+    assert response["Cache-Control"] == (
+        "public, max-age=31536000, immutable"
+    ), "Убедитесь, что копии с хэшем в имени кэшируются надолго."
+
+
+@pytest.mark.parametrize("mode, header, value", [
+    ("x-accel-redirect", "X-Accel-Redirect",
+     "/protected-media/uploads/photo.jpg"),
+    ("x-sendfile", "X-Sendfile", None),
+])
+def test_accel(client, settings, media_file, mode, header, value):
+    settings.MEDIA_ACCEL = mode
+    response = client.get(media_file)
+    assert response.status_code == 200
+    assert response.content == b"", (
+        "Убедитесь, что при MEDIA_ACCEL файл отдаёт фронтенд-сервер."
+    )
+    expected = value or str(settings.MEDIA_ROOT / "uploads/photo.jpg")
+    assert response[header] == expected
+
+
+@pytest.mark.parametrize("path", [
+    "/media/../settings.py", "/media/post_images/", "/media/missing.jpg",
+])
+def test_missing_or_outside(client, media_file, path):
+    assert client.get(path).status_code == 404
+
+
+@pytest.mark.parametrize("path", [
+    "/media/post_images/photo.jpg",
+    "/media/uploads/../post_images/photo.jpg",
+])
+def test_photo_original_only_for_author(
+        client, user_client, mixer, user, media_file, path
+):
+    mixer.blend("blog.Post", author=user, image="post_images/photo.jpg")
+    assert client.get(path).status_code == 404, (
+        "Убедитесь, что оригинал фото с метаданными не отдаётся"
+        " посторонним."
+    )
+    response = user_client.get(path)
+    assert response.status_code == 200, (
+        "Убедитесь, что автор может скачать оригинал своего фото."
+    )
+    assert response["Cache-Control"] == "private, no-cache"
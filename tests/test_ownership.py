@@ -0,0 +1,80 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from blog.models import Post
+
+pytestmark = [pytest.mark.django_db]
+
+
+def _selects_from(client, url, table):
+    with CaptureQueriesContext(connection) as context:
+        response = client.get(url)
+    selects = [
+        query["sql"] for query in context.captured_queries
+        if query["sql"].startswith("SELECT")
+        and f'FROM "{table}"' in query["sql"]
+    ]
+    return response, selects
+
+
+@pytest.mark.parametrize("action", ["edit", "delete"])
+def test_post_is_fetched_once(
+        user_client, post_with_published_location, action
+):
+    post = post_with_published_location
+    response, selects = _selects_from(
+        user_client, f"/posts/{post.id}/{action}/", "blog_post"
+    )
+    assert response.status_code == 200
+    assert len(selects) == 1, (
+        "Убедитесь, что при правке и удалении пост загружается из БД"
+        " один раз."
+    )
+    assert '"blog_post"."comment_count"' not in selects[0]
+
+
+@pytest.mark.parametrize("action", ["edit_comment", "delete_comment"])
+def test_comment_is_fetched_once(user_client, user, mixer,
+                                 post_with_published_location, action):
+    post = post_with_published_location
+    comment = mixer.blend("blog.Comment", post=post, author=user)
+    response, selects = _selects_from(
+        user_client, f"/posts/{post.id}/{action}/{comment.id}/",
+        "blog_comment",
+    )
+    assert response.status_code == 200
+    assert len(selects) == 1, (
+        "Убедитесь, что при правке и удалении комментарий загружается из БД"
+        " один раз."
+    )
+
+
+def test_post_edit_keeps_counters(
+        mixer, user_client, post_with_published_location
+):
+    post = post_with_published_location
+    mixer.cycle(2).blend("blog.Comment", post=post)
+    response = user_client.post(f"/posts/{post.id}/edit/", {
+        "title": "Новый заголовок",
+        "text": post.text,
+        "pub_date": post.pub_date.strftime("%Y-%m-%dT%H:%M"),
+        "category": post.category_id,
+        "location": post.location_id,
+        "is_published": True,
+    })
+    assert response.status_code == 302
+    post = Post.objects.get(pk=post.pk)
+    assert post.title == "Новый заголовок"
+    assert post.comment_count == 2, (
+        "Убедитесь, что правка поста не перезаписывает счётчик комментариев."
+    )
+
+
+def test_foreign_post_redirects(
+        another_user_client, post_with_published_location
+):
+    post = post_with_published_location
+    response = another_user_client.get(f"/posts/{post.id}/edit/")
+    assert response.status_code == 302
+    assert response.url == f"/posts/{post.id}/"
@@ -0,0 +1,144 @@
+import pytest
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext, override_settings
+
+from blog import models
+from blog.models import Category
+
+pytestmark = [pytest.mark.django_db]
+
+
+@pytest.fixture(autouse=True)
+def enable_page_cache():
+    cache.clear()
+    with override_settings(PAGE_CACHE_TIMEOUT=60):
+        yield
+    cache.clear()
+
+
+def _get(client, url):
+    with CaptureQueriesContext(connection) as context:
+        response = client.get(url)
+    assert response.status_code == 200
+    return response.content.decode("utf-8"), len(context.captured_queries)
+
+
+@pytest.mark.parametrize(
+    "get_url, expected_queries",
+    [
+        (lambda post: "/", 0),
+        (lambda post: f"/category/{post.category.slug}/", 0),
+        (lambda post: f"/profile/{post.author.username}/", 0),
+        (lambda post: f"/posts/{post.id}/", 0),
+        (lambda post: "/pages/about/", 0),
+    ],
+    ids=["index", "category", "profile", "detail", "about"],
+)
+def test_anonymous_page_is_served_from_cache(
+        client, post_with_published_location, get_url, expected_queries
+):
+    url = get_url(post_with_published_location)
+    content, _ = _get(client, url)
+    cached, queries = _get(client, url)
+    assert cached == content
+    assert queries == expected_queries, (
+        "Убедитесь, что повторный запрос анонима отдаётся из кэша страниц"
+        " без обращений к БД."
+    )
+
+
+@pytest.mark.parametrize("query", ["?x=1", "?after=garbage", "?last=yes"])
+def test_foreign_query_is_not_cached(
+        client, post_with_published_location, query
+):
+    _get(client, "/")
+    _get(client, "/" + query)
+    _, queries = _get(client, "/" + query)
+    assert queries > 0, (
+        "Убедитесь, что страницы с посторонними или испорченными"
+        " параметрами запроса не сохраняются в кэш страниц."
+    )
+    _, queries = _get(client, "/")
+    assert queries == 0
+
+
+def test_cached_page_has_personal_holes(
+        mixer, client, user_client, another_user_client, user,
+        post_with_published_location
+):
+    post = post_with_published_location
+    url = f"/posts/{post.id}/"
+    mixer.blend("blog.Comment", post=post, author=user)
+    anonymous, _ = _get(client, url)
+    assert "Оставить комментарий" not in anonymous
+    assert "Войти" in anonymous
+
+    own, _ = _get(user_client, url)
+    assert "Выйти" in own
+    assert "Отредактировать публикацию" in own, (
+        "Убедитесь, что автор видит кнопки управления постом на странице"
+        " из кэша."
+    )
+    assert "Отредактировать комментарий" in own
+    assert "Оставить комментарий" in own and "csrfmiddlewaretoken" in own
+
+    other, _ = _get(another_user_client, url)
+    assert "Оставить комментарий" in other
+    assert "Отредактировать публикацию" not in other, (
+        "Убедитесь, что кнопки автора не попадают в кэш страницы."
+    )
+    assert "Отредактировать комментарий" not in other
+
+
+def test_page_cache_follows_shown_content(
+        mixer, client, user_client, user, post_with_published_location
+):
+    post = post_with_published_location
+    _get(client, "/")
+    post.category.title = "Новое название категории"
+    post.category.save()
+    content, _ = _get(client, "/")
+    assert "Новое название категории" in content, (
+        "Убедитесь, что кэш страницы сбрасывается при изменении постов,"
+        " которые на ней выводятся."
+    )
+
+    hidden = mixer.blend(
+        "blog.Post", author=user, category=post.category, is_published=False
+    )
+    own, _ = _get(user_client, f"/profile/{user.username}/")
+    assert hidden.title in own
+    public, _ = _get(client, f"/profile/{user.username}/")
+    assert hidden.title not in public, (
+        "Убедитесь, что страница автора со скрытыми постами не кэшируется."
+    )
+
+
+def test_hidden_post_page_leaves_cache(client, post_with_published_location):
+    post = post_with_published_location
+    url = f"/posts/{post.id}/"
+    assert client.get(url).status_code == 200
+    Category.objects.filter(pk=post.category_id).update(is_published=False)
+    assert client.get(url).status_code == 404, (
+        "Убедитесь, что страница поста, скрытого снятием категории"
+        " с публикации, не отдаётся из кэша."
+    )
+
+
+def test_category_change_bumps_one_version(
+        monkeypatch, mixer, post_with_published_location
+):
+    post = post_with_published_location
+    mixer.cycle(5).blend(
+        "blog.Post", category=post.category, author=post.author
+    )
+    bumped = []
+    monkeypatch.setattr(
+        models, "bump_card_version", lambda *key: bumped.append(key)
+    )
+    Category.objects.filter(pk=post.category_id).update(is_published=False)
+    assert bumped == [("category", post.category_id)], (
+        "Убедитесь, что при снятии категории с публикации увеличивается"
+        " одна версия категории, а не версии всех её постов."
+    )
@@ -0,0 +1,162 @@
+from datetime import datetime
+
+import pytest
+import pytz
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from conftest import N_PER_PAGE
+
+pytestmark = [pytest.mark.django_db]
+
+
+@pytest.fixture
+def posts_with_same_pub_date(mixer, user, published_category):
+    pub_date = datetime(2020, 1, 1, tzinfo=pytz.UTC)
+    return mixer.cycle(N_PER_PAGE * 2 + 3).blend(
+        "blog.Post",
+        author=user,
+        category=published_category,
+        is_published=True,
+        pub_date=pub_date,
+        title=mixer.sequence(lambda i: f"Пост {i % 4}"),
+    )
+
+
+def _walk(client, url, direction, cursor=None):
+    seen = []
+    pages = []
+    while True:
+        query = {direction: cursor} if cursor else {}
+        page_obj = client.get(url, query).context["page_obj"]
+        assert len(page_obj) <= N_PER_PAGE
+        pages.append(page_obj.number)
+        seen.append([post.id for post in page_obj])
+        cursor = (
+            page_obj.next_cursor if direction == "after"
+            else page_obj.previous_cursor
+        )
+        if not cursor:
+            return seen, pages
+
+
+def test_cursor_pagination_walks_every_post_once(
+        user_client, posts_with_same_pub_date
+):
+    expected = sorted(posts_with_same_pub_date, key=lambda p: (p.title, p.id))
+    seen, pages = _walk(user_client, "/", "after")
+    assert [i for page in seen for i in page] == [p.id for p in expected], (
+        "Убедитесь, что переход по курсорам `?after=` выводит каждую"
+        " публикацию ровно один раз в порядке сортировки ленты."
+    )
+    assert pages == [1, 2, 3]
+
+    last_page = user_client.get("/", {"after": _last_cursor(user_client)})
+    back, back_pages = _walk(
+        user_client, "/", "before",
+        last_page.context["page_obj"].previous_cursor,
+    )
+    assert back[::-1] == seen[:-1], (
+        "Убедитесь, что курсор `?before=` возвращает на предыдущие страницы."
+    )
+    assert back_pages == [2, 1]
+
+
+def _last_cursor(client):
+    page_obj = client.get("/").context["page_obj"]
+    cursor = None
+    while page_obj.has_next():
+        cursor = page_obj.next_cursor
+        page_obj = client.get("/", {"after": cursor}).context["page_obj"]
+    return cursor
+
+
+def test_invalid_cursor_falls_back_to_first_page(
+        user_client, posts_with_same_pub_date
+):
+    first = user_client.get("/").context["page_obj"]
+    response = user_client.get("/", {"after": "не-курсор"})
+    assert response.status_code == 200
+    page_obj = response.context["page_obj"]
+    assert page_obj.number == 1
+    assert [p.id for p in page_obj] == [p.id for p in first]
+
+
+@pytest.fixture
+def many_pages_of_posts(mixer, user, published_category):
+    return mixer.cycle(N_PER_PAGE * 7).blend(
+        "blog.Post",
+        author=user,
+        category=published_category,
+        is_published=True,
+        pub_date=datetime(2020, 1, 1, tzinfo=pytz.UTC),
+        title=mixer.sequence(lambda i: f"Пост {i:03}"),
+    )
+
+
+def _labels(page_obj):
+    return [link.label for link in page_obj.window]
+
+
+def _follow(client, page_obj, label):
+    link = next(link for link in page_obj.window if link.label == label)
+    query = dict(part.split("=", 1) for part in link.query.split("&") if part)
+    return client.get("/", query).context["page_obj"]
+
+
+def test_paginator_window(user_client, many_pages_of_posts):
+    page_obj = user_client.get("/").context["page_obj"]
+    assert _labels(page_obj) == ["1", "2", "3", "…", "7"], (
+        "Убедитесь, что пагинатор выводит только соседние страницы,"
+        " пропуск и ссылку на последнюю страницу."
+    )
+
+    page_obj = _follow(user_client, _follow(user_client, page_obj, "3"), "5")
+    assert page_obj.number == 5
+    assert _labels(page_obj) == ["1", "…", "3", "4", "5", "6", "7"]
+    assert [p.title for p in page_obj] == [
+        f"Пост {i:03}" for i in range(4 * N_PER_PAGE, 5 * N_PER_PAGE)
+    ], "Убедитесь, что ссылки окна пагинатора ведут на нужные страницы."
+
+    page_obj = _follow(user_client, page_obj, "3")
+    assert page_obj.number == 3
+    assert [p.title for p in page_obj] == [
+        f"Пост {i:03}" for i in range(2 * N_PER_PAGE, 3 * N_PER_PAGE)
+    ]
+
+    last = user_client.get("/", {"last": 1}).context["page_obj"]
+    assert not last.has_next()
+    assert last.number == 7
+    assert [p.title for p in last] == [
+        f"Пост {i:03}" for i in range(6 * N_PER_PAGE, 7 * N_PER_PAGE)
+    ], "Убедитесь, что `?last=1` выводит последнюю страницу ленты."
+
+
+def test_feed_count_is_cached_per_feed_version(
+        mixer, user_client, many_pages_of_posts
+):
+    with CaptureQueriesContext(connection) as context:
+        user_client.get("/")
+        user_client.get("/")
+    counts = [
+        query for query in context.captured_queries
+        if "COUNT(" in query["sql"]
+    ]
+    assert len(counts) == 1, (
+        "Убедитесь, что число публикаций в ленте кэшируется."
+    )
+
+    post = many_pages_of_posts[0]
+    mixer.cycle(3).blend(
+        "blog.Post",
+        author=post.author,
+        category=post.category,
+        is_published=True,
+        pub_date=post.pub_date,
+        title="Пост 999",
+    )
+    last = user_client.get("/", {"last": 1}).context["page_obj"]
+    assert last.number == 8 and len(last) == 3, (
+        "Убедитесь, что после публикации поста число страниц пересчитывается,"
+        " а последняя страница совпадает с последней при листании вперёд."
+    )
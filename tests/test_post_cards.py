@@ -0,0 +1,63 @@
+import pytest
+from django.core.cache import cache
+
+pytestmark = [pytest.mark.django_db]
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    cache.clear()
+    yield
+    cache.clear()
+
+
+def _feed(client):
+    return client.get("/").content.decode("utf-8")
+
+
+def test_post_card_follows_dependencies(
+        mixer, client, user, post_with_published_location
+):
+    post = post_with_published_location
+    assert post.title in _feed(client)
+
+    post.category.title = "Обновлённая категория"
+    post.category.save()
+    assert "Обновлённая категория" in _feed(client), (
+        "Убедитесь, что карточка поста в кэше обновляется при изменении"
+        " категории."
+    )
+
+    mixer.blend("blog.Comment", post=post)
+    assert "Комментарии (1)" in _feed(client), (
+        "Убедитесь, что карточка поста в кэше обновляется при добавлении"
+        " комментария."
+    )
+
+    post.location.name = "Новое место"
+    post.location.save()
+    user.username = "renamed_author"
+    user.save()
+    content = _feed(client)
+    assert "Новое место" in content and "@renamed_author" in content, (
+        "Убедитесь, что карточка поста в кэше обновляется при изменении"
+        " местоположения и автора."
+    )
+
+    type(post).objects.filter(pk=post.pk).update(title="Новый заголовок")
+    assert post.title in _feed(client), (
+        "Убедитесь, что без сигналов карточка берётся из кэша."
+    )
+
+
+def test_post_card_cache_timeout_setting(
+        settings, client, post_with_published_location
+):
+    settings.POST_CARD_CACHE_TIMEOUT = 0
+    post = post_with_published_location
+    _feed(client)
+    type(post).objects.filter(pk=post.pk).update(title="Новый заголовок")
+    assert "Новый заголовок" in _feed(client), (
+        "Убедитесь, что время жизни карточки в кэше задаётся настройкой"
+        " `POST_CARD_CACHE_TIMEOUT`."
+    )
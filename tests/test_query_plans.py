@@ -0,0 +1,63 @@
+import pytest
+from django.db import connection
+from django.utils import timezone
+
+from blog.models import Comment, Post
+from blog.utils import get_feed_query
+
+pytestmark = [
+    pytest.mark.django_db,
+    pytest.mark.skipif(
+        connection.vendor != "sqlite",
+        reason="EXPLAIN QUERY PLAN есть только в SQLite.",
+    ),
+]
+
+
+def _query_plan(queryset):
+    sql, params = queryset.query.sql_with_params()
+    with connection.cursor() as cursor:
+        cursor.execute(f"EXPLAIN QUERY PLAN {sql}", params)
+        return "\n".join(row[-1] for row in cursor.fetchall())
+
+
+@pytest.mark.parametrize(
+    "get_queryset, index_name",
+    [
+        (lambda: get_feed_query(), "post_visible_feed_idx"),
+        (
+            lambda: get_feed_query(category=1),
+            "post_category_feed_idx",
+        ),
+        (
+            lambda: get_feed_query(author=1),
+            "post_author_feed_idx",
+        ),
+        (
+            lambda: get_feed_query(author=1, only_visible=False),
+            "post_author_feed_idx",
+        ),
+        (
+            lambda: Comment.objects.filter(post_id=1).select_related(
+                "author"
+            ),
+            "comment_post_created_idx",
+        ),
+        (
+            lambda: Post.objects.scheduled().filter(
+                pub_date__lte=timezone.now()
+            ),
+            "post_scheduled_idx",
+        ),
+    ],
+    ids=["index feed", "category feed", "author feed", "own profile",
+         "post comments", "scheduled release"],
+)
+def test_hot_queries_use_indexes(get_queryset, index_name):
+    plan = _query_plan(get_queryset()[:11])
+    assert index_name in plan, (
+        f"Убедитесь, что запрос использует индекс `{index_name}`:\n{plan}"
+    )
+    assert "TEMP B-TREE" not in plan, (
+        f"Убедитесь, что сортировка обслуживается индексом:\n{plan}"
+    )
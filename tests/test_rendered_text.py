@@ -0,0 +1,67 @@
+from io import StringIO
+from pathlib import Path
+
+import pytest
+from django.core.management import call_command
+
+from blog.models import Post
+from blog.utils import get_feed_query
+
+pytestmark = [pytest.mark.django_db]
+
+FIXTURE = Path(__file__).resolve().parent.parent / "db.json"
+
+
+def test_rendered_text_on_save(post_with_published_location):
+    post = post_with_published_location
+    post.text = "<b>Раз</b>\nдва " + " ".join(["слово"] * 20)
+    post.save(update_fields=["text"])
+    post.refresh_from_db()
+    assert post.excerpt.startswith("<b>Раз</b> два") and post.excerpt.endswith(
+        "…"
+    ), "Убедитесь, что анонс публикации пересчитывается при сохранении."
+    assert post.rendered_html.startswith("&lt;b&gt;Раз&lt;/b&gt;<br>два"), (
+        "Убедитесь, что HTML текста публикации экранирован и пересчитывается"
+        " при сохранении."
+    )
+
+
+def test_feed_query_defers_text(post_with_published_location):
+    sql = str(get_feed_query().query)
+    assert '"blog_post"."text"' not in sql, (
+        "Убедитесь, что запрос ленты не загружает полный текст публикаций."
+    )
+    assert '"blog_post"."excerpt"' in sql
+
+
+def test_render_posts_command(post_with_published_location):
+    post = post_with_published_location
+    Post.objects.filter(pk=post.pk).update(excerpt="", rendered_html="")
+    call_command("render_posts", stdout=StringIO())
+    post.refresh_from_db()
+    assert post.excerpt and post.rendered_html, (
+        "Убедитесь, что команда `render_posts` заполняет анонс и HTML текста."
+    )
+
+
+def test_render_posts_refreshes_cached_cards(
+        client, post_with_published_location
+):
+    post = post_with_published_location
+    client.get("/")
+    Post.objects.filter(pk=post.pk).update(text="Совсем новый анонс")
+    call_command("render_posts", stdout=StringIO())
+    assert "Совсем новый анонс" in client.get("/").content.decode(), (
+        "Убедитесь, что после команды `render_posts` карточки в ленте"
+        " показывают новый анонс, а не версию из кэша."
+    )
+
+
+def test_loaddata_renders_text():
+    call_command("loaddata", FIXTURE, stdout=StringIO())
+    assert Post.objects.exists()
+    assert not Post.objects.filter(rendered_html="").exists(), (
+        "Убедитесь, что анонс и HTML текста заполняются и для постов,"
+        " загруженных командой `loaddata`."
+    )
+    assert not Post.objects.filter(excerpt="").exists()
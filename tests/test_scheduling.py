@@ -0,0 +1,65 @@
+from datetime import timedelta
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from django.utils import timezone
+
+from blog.models import Post
+from blog.versioning import get_feed_version
+
+pytestmark = [pytest.mark.django_db]
+
+
+@pytest.fixture
+def scheduled_post(mixer, user, published_category):
+    return mixer.blend(
+        "blog.Post",
+        author=user,
+        is_published=True,
+        category=published_category,
+        pub_date=timezone.now() + timedelta(days=1),
+    )
+
+
+def test_scheduled_post_is_hidden_until_release(scheduled_post):
+    assert not scheduled_post.is_visible, (
+        "Убедитесь, что публикация с датой в будущем не видна в лентах."
+    )
+
+    Post.objects.filter(pk=scheduled_post.pk).update(
+        pub_date=timezone.now() - timedelta(minutes=1)
+    )
+    scheduled_post.refresh_from_db()
+    assert scheduled_post.is_visible, (
+        "Убедитесь, что перенос даты публикации в прошлое делает её видимой."
+    )
+
+
+def test_publish_scheduled_command(scheduled_post):
+    version = get_feed_version()
+    call_command("publish_scheduled", stdout=StringIO())
+    scheduled_post.refresh_from_db()
+    assert not scheduled_post.is_visible
+    assert get_feed_version() == version, (
+        "Убедитесь, что версия лент не меняется, если публиковать нечего."
+    )
+
+    Post.objects.filter(pk=scheduled_post.pk).update(
+        pub_date=timezone.now() + timedelta(seconds=1)
+    )
+    version = get_feed_version()
+    out = StringIO()
+    with pytest.MonkeyPatch.context() as mp:
+        later = timezone.now() + timedelta(minutes=1)
+        mp.setattr(timezone, "now", lambda: later)
+        call_command("publish_scheduled", stdout=out)
+    scheduled_post.refresh_from_db()
+    assert scheduled_post.is_visible, (
+        "Убедитесь, что команда `publish_scheduled` открывает публикации,"
+        " время которых наступило."
+    )
+    assert get_feed_version() > version, (
+        "Убедитесь, что открытие публикаций меняет версию лент."
+    )
+    assert "1" in out.getvalue()
@@ -0,0 +1,114 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from blog.models import Comment, Post
+from blog.search import filter_matching, match_expression, rank_matching
+
+pytestmark = [pytest.mark.django_db]
+
+
+@pytest.fixture
+def make_post(mixer, user, published_location, published_category):
+    def make(title, text):
+        return mixer.blend(
+            "blog.Post", title=title, text=text, author=user,
+            category=published_category, location=published_location,
+        )
+    return make
+
+
+def _found(queryset, query):
+    return list(filter_matching(queryset, query))
+
+
+def test_match_expression_drops_operators():
+    assert match_expression('"кот" OR (собака*') == (
+        '"кот"* "OR"* "собака"*'
+    )
+    assert match_expression("  -- ") == ""
+
+
+def test_search_ranks_title_above_text(make_post):
+    in_text = make_post("Про погоду", "Сегодня снова шёл дождь.")
+    in_title = make_post("Дождь в городе", "Мокро.")
+    make_post("Солнце", "Ясно.")
+    found = list(rank_matching(Post.objects.all(), "дожд"))
+    assert found == [in_title, in_text], (
+        "Убедитесь, что поиск находит посты по началу слова и ставит"
+        " совпадения в заголовке выше совпадений в тексте."
+    )
+
+
+def test_search_index_follows_changes(make_post):
+    post = make_post("Черновик", "Пусто.")
+    assert _found(Post.objects.all(), "черновик") == [post]
+    post.title = "Итоги года"
+    post.save()
+    assert not _found(Post.objects.all(), "черновик")
+    Post.objects.filter(pk=post.pk).update(text="Подводим итоги.")
+    assert _found(Post.objects.all(), "подводим") == [post]
+    post.delete()
+    assert not _found(Post.objects.all(), "итоги"), (
+        "Убедитесь, что индекс поиска обновляется при изменении и удалении"
+        " публикаций."
+    )
+
+
+def test_comment_search(mixer, post_with_published_location):
+    comment = mixer.blend(
+        "blog.Comment", post=post_with_published_location,
+        text="Отличная статья",
+    )
+    mixer.blend(
+        "blog.Comment", post=post_with_published_location, text="Спасибо",
+    )
+    assert _found(Comment.objects.all(), "отличн") == [comment]
+
+
+def test_search_view(client, make_post):
+    posts = [make_post(f"Поход {i}", "Горы и реки.") for i in range(12)]
+    make_post("Рецепт", "Суп.")
+    response = client.get("/search/", {"q": "горы"})
+    assert response.status_code == 200
+    page_obj = response.context["page_obj"]
+    assert page_obj.paginator.count == len(posts)
+    assert len(page_obj.object_list) == 10
+    response = client.get("/search/", {"q": "горы", "page": 2})
+    assert len(response.context["page_obj"].object_list) == 2, (
+        "Убедитесь, что результаты поиска разбиты на страницы."
+    )
+    response = client.get("/search/")
+    assert response.status_code == 200
+    assert response.context["page_obj"] is None
+
+
+def test_search_view_hides_invisible_posts(client, make_post):
+    post = make_post("Секретный план", "Текст.")
+    Post.objects.filter(pk=post.pk).update(is_visible=False)
+    response = client.get("/search/", {"q": "секретный"})
+    assert not response.context["page_obj"].object_list
+
+
+def test_admin_uses_search_index(admin_client, make_post):
+    post = make_post("Велосипеды", "Про колёса.")
+    make_post("Самокаты", "Тоже про колёса.")
+    response = admin_client.get("/admin/blog/post/", {"q": "велосипед"})
+    assert response.status_code == 200
+    assert list(response.context["cl"].result_list) == [post]
+
+
+def test_search_view_matches_once_per_query(client, make_post):
+    for i in range(12):
+        make_post(f"Поход {i}", "Горы и реки.")
+    with CaptureQueriesContext(connection) as context:
+        response = client.get("/search/", {"q": "горы"})
+    assert response.context["page_obj"].paginator.count == 12
+    searches = [query["sql"] for query in context.captured_queries
+                if "MATCH" in query["sql"]]
+    assert len(searches) == 2 and all(
+        sql.count("MATCH") == 1 for sql in searches
+    ), (
+        "Убедитесь, что ранг берётся из присоединённой таблицы индекса,"
+        " а не из подзапроса для каждой найденной публикации."
+    )
@@ -0,0 +1,45 @@
+import gzip
+import re
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+
+pytestmark = [pytest.mark.django_db]
+
+
+@pytest.fixture
+def collected(settings, tmp_path):
+    settings.STATIC_ROOT = tmp_path
+    call_command("collectstatic", interactive=False, stdout=StringIO())
+    return tmp_path
+
+
+def test_bootstrap_is_local_before_collectstatic(client):
+    content = client.get("/").content.decode()
+    assert 'href="/static/css/bootstrap.min.css"' in content, (
+        "Убедитесь, что Bootstrap подключается из локальной статики."
+    )
+    assert "cdn.jsdelivr.net" not in content
+
+
+def test_collectstatic_hashes_and_compresses(collected):
+    css = list((collected / "css").glob("bootstrap.min.*.css"))
+    assert len(css) == 1, (
+        "Убедитесь, что collectstatic добавляет хэш содержимого в имена."
+    )
+    compressed = css[0].with_name(css[0].name + ".gz")
+    assert gzip.decompress(compressed.read_bytes()) == css[0].read_bytes(), (
+        "Убедитесь, что рядом со статикой лежат сжатые gzip копии."
+    )
+    assert not list((collected / "img").glob("logo*.png.gz")), (
+        "Убедитесь, что уже сжатые форматы повторно не сжимаются."
+    )
+
+
+def test_templates_use_hashed_names(client, collected):
+    content = client.get("/").content.decode()
+    assert re.search(
+        r'href="/static/css/bootstrap\.min\.[0-9a-f]{12}\.css"', content
+    ), "Убедитесь, что `bootstrap_css` ссылается на копию с хэшем в имени."
+    assert re.search(r"/static/img/fav/favicon\.[0-9a-f]{12}\.ico", content)
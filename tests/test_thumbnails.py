@@ -0,0 +1,201 @@
+import os
+from datetime import timedelta
+from io import BytesIO, StringIO
+
+import pytest
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.utils import timezone
+from PIL import Image
+
+from blog import image_jobs
+from blog.images import make_thumbnails, variant_name
+from blog.models import ImageJob, Post
+
+pytestmark = [pytest.mark.django_db]
+
+
+@pytest.fixture
+def media_root(settings, tmp_path):
+    settings.MEDIA_ROOT = tmp_path
+    settings.POST_IMAGE_WIDTHS = (320, 640, 1280)
+    return tmp_path
+
+
+@pytest.fixture
+def post_with_photo(media_root, post_with_published_location):
+    exif = Image.Exif()
+    exif[0x010F] = "Phone"
+    data = BytesIO()
+    Image.new("RGB", (1000, 500)).save(data, "JPEG", exif=exif)
+    post = post_with_published_location
+    post.image = SimpleUploadedFile(
+        "photo.jpg", data.getvalue(), content_type="image/jpeg"
+    )
+    post.save()
+    return post
+
+
+def process_images(workers=0):
+    out = StringIO()
+    call_command("process_images", workers=workers, stdout=out)
+    return out.getvalue()
+
+
+def test_photo_waits_for_worker(client, post_with_photo):
+    post = Post.objects.get(pk=post_with_photo.pk)
+    assert post.image_pending and post.image_variants == {
+        "width": 1000, "height": 500
+    }, "Убедитесь, что до обработки известны только размеры оригинала."
+    assert ImageJob.objects.filter(post=post).count() == 1
+    content = client.get("/").content.decode()
+    assert "photo-placeholder.svg" in content, (
+        "Убедитесь, что до обработки фото в ленте выводится заглушка."
+    )
+
+
+@pytest.mark.parametrize("workers", [0, 1])
+def test_thumbnails_created_by_worker(post_with_photo, media_root, workers):
+    assert "Обработано фото: 1" in process_images(workers)
+    post = Post.objects.get(pk=post_with_photo.pk)
+    variants = post.image_variants
+    assert variants["widths"] == [320, 640, 1000], (
+        "Убедитесь, что обработчик создаёт уменьшенные копии фото."
+    )
+    assert variants["fallback"] == "jpg" and "webp" in variants["formats"]
+    assert not ImageJob.objects.exists()
+    for ext in variants["formats"] + ["jpg"]:
+        name = variant_name(post.image.name, 320, ext, variants["digest"])
+        with Image.open(media_root / name) as img:
+            assert img.size == (320, 160)
+            assert not img.getexif(), (
+                "Убедитесь, что из копий фото удаляются метаданные EXIF."
+            )
+
+
+def test_feed_uses_srcset(client, post_with_photo):
+    process_images()
+    content = client.get("/").content.decode()
+    assert 'srcset="' in content and ".640w.jpg 640w" in content, (
+        "Убедитесь, что в ленте у фото указан srcset с уменьшенными копиями."
+    )
+    assert '<source type="image/webp"' in content, (
+        "Убедитесь, что фото в ленте выводится через <picture> с WebP."
+    )
+    assert 'width="1000" height="500"' in content
+    assert post_with_photo.image.url not in content, (
+        "Убедитесь, что оригинал фото не показывается в ленте."
+    )
+
+
+def test_original_only_for_author(
+        client, user_client, post_with_photo
+):
+    process_images()
+    url = f"/posts/{post_with_photo.pk}/"
+    original = post_with_photo.image.url
+    assert original in user_client.get(url).content.decode(), (
+        "Убедитесь, что автору доступна ссылка на оригинал фото."
+    )
+    assert original not in client.get(url).content.decode(), (
+        "Убедитесь, что оригинал фото не виден другим пользователям."
+    )
+
+
+def test_photo_is_rotated_and_capped(
+        settings, media_root, post_with_published_location
+):
+    settings.POST_IMAGE_MAX_SIZE = 300
+    exif = Image.Exif()
+    exif[0x0112] = 6
+    data = BytesIO()
+    Image.new("RGB", (1000, 500)).save(data, "JPEG", exif=exif)
+    post = post_with_published_location
+    post.image = SimpleUploadedFile("rotated.jpg", data.getvalue())
+    post.save()
+    assert post.image_variants == {"width": 500, "height": 1000}
+    process_images()
+    post.refresh_from_db()
+    assert post.image_variants["widths"] == [150], (
+        "Убедитесь, что фото поворачивается по EXIF и уменьшается до"
+        " POST_IMAGE_MAX_SIZE."
+    )
+    assert post.image_variants["height"] == 300
+
+
+def test_broken_photo_is_not_shown(
+        settings, client, post_with_photo, media_root
+):
+    settings.IMAGE_JOB_ATTEMPTS = 1
+    (media_root / post_with_photo.image.name).write_bytes(b"not an image")
+    process_images()
+    post = Post.objects.get(pk=post_with_photo.pk)
+    assert not post.image_pending, (
+        "Убедитесь, что после неудачных попыток заглушка убирается."
+    )
+    assert not ImageJob.objects.exists()
+    content = client.get("/").content.decode()
+    assert "photo-placeholder.svg" not in content
+    assert post.image.url not in content, (
+        "Убедитесь, что вместо необработанного фото не выводится оригинал"
+        " с метаданными."
+    )
+
+
+def crash_on_bad_photo(name):
+    if "crash" in name:
+        os._exit(1)
+    return make_thumbnails(name)
+
+
+def test_worker_survives_crashed_process(
+        settings, monkeypatch, post_with_photo, media_root
+):
+    settings.IMAGE_JOB_ATTEMPTS = 1
+    monkeypatch.setattr(image_jobs, "make_thumbnails", crash_on_bad_photo)
+    good_pk = post_with_photo.pk
+    post = post_with_photo
+    post.pk = None
+    post.image = SimpleUploadedFile(
+        "crash.jpg", post_with_photo.image.read(), content_type="image/jpeg"
+    )
+    post.save()
+    assert "Обработано фото: 2" in process_images(workers=1), (
+        "Убедитесь, что обработчик не падает, если упал процесс пула."
+    )
+    good = Post.objects.get(pk=good_pk)
+    assert good.image_variants["widths"] == [320, 640, 1000], (
+        "Убедитесь, что падение процесса пула не отнимает попытку у"
+        " остальных фото пачки."
+    )
+    assert not Post.objects.get(pk=post.pk).image_pending
+    assert not ImageJob.objects.exists()
+
+
+def test_stale_job_without_attempts_fails(settings, post_with_photo):
+    ImageJob.objects.update(
+        attempts=settings.IMAGE_JOB_ATTEMPTS,
+        started_at=timezone.now() - timedelta(
+            seconds=settings.IMAGE_JOB_TIMEOUT + 1
+        ),
+    )
+    process_images()
+    assert not ImageJob.objects.exists(), (
+        "Убедитесь, что зависшая задача без оставшихся попыток завершается."
+    )
+    assert not Post.objects.get(pk=post_with_photo.pk).image_pending, (
+        "Убедитесь, что у поста с зависшей задачей убирается заглушка."
+    )
+
+
+def test_make_thumbnails_command(post_with_photo, media_root):
+    process_images()
+    Post.objects.update(image_variants={})
+    call_command("make_thumbnails", stdout=StringIO())
+    assert Post.objects.get(pk=post_with_photo.pk).image_pending, (
+        "Убедитесь, что команда `make_thumbnails` ставит старые фото"
+        " в очередь."
+    )
+    process_images()
+    post = Post.objects.get(pk=post_with_photo.pk)
+    assert post.image_variants["widths"] == [320, 640, 1000]
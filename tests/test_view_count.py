@@ -0,0 +1,72 @@
+import pytest
+from django.core.cache import cache
+from django.test.utils import override_settings
+
+from blog.counters import view_counter
+
+pytestmark = [pytest.mark.django_db]
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    cache.clear()
+    yield
+    cache.clear()
+
+
+@override_settings(VIEW_COUNT_FLUSH_HITS=3, VIEW_COUNT_FLUSH_INTERVAL=3600)
+def test_views_are_buffered_and_flushed_in_batches(
+        client, post_with_published_location, mixer
+):
+    post = post_with_published_location
+    other = mixer.blend(
+        "blog.Post", category=post.category, is_published=True,
+        pub_date=post.pub_date,
+    )
+    client.get(f"/posts/{post.id}/")
+    client.get(f"/posts/{other.id}/")
+    post.refresh_from_db()
+    assert post.view_count == 0, (
+        "Убедитесь, что просмотры копятся в памяти, а не пишутся в БД"
+        " на каждый запрос."
+    )
+
+    response = client.get(f"/posts/{post.id}/")
+    assert response.status_code == 200
+    post.refresh_from_db()
+    other.refresh_from_db()
+    assert (post.view_count, other.view_count) == (2, 1), (
+        "Убедитесь, что накопленные просмотры сбрасываются в БД пачкой."
+    )
+
+    client.get(f"/posts/{post.id}/")
+    view_counter.flush()
+    post.refresh_from_db()
+    assert post.view_count == 3
+    assert "Просмотры: 3" in client.get("/").content.decode(), (
+        "Убедитесь, что число просмотров выводится в карточке поста."
+    )
+    assert "Просмотры: 3" in client.get(f"/posts/{post.id}/").content.decode()
+
+
+def test_missing_post_is_not_counted(client):
+    assert client.get("/posts/100500/").status_code == 404
+    assert not view_counter.take_pending()
+
+
+def test_flush_keeps_caches_valid(client, post_with_published_location):
+    post = post_with_published_location
+    url = f"/category/{post.category.slug}/"
+    with override_settings(PAGE_CACHE_TIMEOUT=60):
+        response = client.get(url)
+        client.get(f"/posts/{post.id}/")
+        view_counter.flush()
+        assert client.get(
+            url, HTTP_IF_NONE_MATCH=response["ETag"]
+        ).status_code == 304, (
+            "Убедитесь, что сброс просмотров в БД не меняет ETag лент."
+        )
+        assert "Просмотры: 1" in client.get(url).content.decode(), (
+            "Убедитесь, что число просмотров в закэшированной странице"
+            " обновляется без сброса кэша."
+        )
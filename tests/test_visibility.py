@@ -0,0 +1,72 @@
+from io import StringIO
+from pathlib import Path
+
+import pytest
+from django.core.management import call_command
+from django.utils import timezone
+
+from blog.models import Category, Post
+
+pytestmark = [pytest.mark.django_db]
+
+FIXTURE = Path(__file__).resolve().parent.parent / "db.json"
+
+
+def _visible_ids():
+    return set(
+        Post.objects.filter(is_visible=True).values_list("id", flat=True)
+    )
+
+
+def test_is_visible_computed_on_save(
+        post_with_published_location, posts_with_unpublished_category,
+        unpublished_posts_with_published_locations
+):
+    assert _visible_ids() == {post_with_published_location.id}, (
+        "Убедитесь, что флаг `is_visible` установлен только у опубликованных"
+        " постов из опубликованных категорий."
+    )
+
+
+def test_category_publication_recomputes_posts(
+        many_posts_with_published_locations, published_category
+):
+    post_ids = {post.id for post in many_posts_with_published_locations}
+    assert _visible_ids() == post_ids
+
+    published_category.is_published = False
+    published_category.save()
+    assert not _visible_ids(), (
+        "Убедитесь, что при снятии категории с публикации её посты"
+        " перестают быть видимыми."
+    )
+
+    Category.objects.filter(pk=published_category.pk).update(
+        is_published=True
+    )
+    assert _visible_ids() == post_ids, (
+        "Убедитесь, что `QuerySet.update()` категорий пересчитывает"
+        " видимость постов."
+    )
+
+    Post.objects.filter(pk__in=list(post_ids)[:3]).update(is_published=False)
+    assert len(_visible_ids()) == len(post_ids) - 3
+
+    published_category.delete()
+    assert not _visible_ids(), (
+        "Убедитесь, что посты удалённой категории скрываются из лент."
+    )
+
+
+def test_loaddata_computes_visibility(client):
+    call_command("loaddata", FIXTURE, stdout=StringIO())
+    expected = set(Post.objects.filter(
+        is_published=True,
+        category__is_published=True,
+        pub_date__lte=timezone.now(),
+    ).values_list("id", flat=True))
+    assert expected and _visible_ids() == expected, (
+        "Убедитесь, что флаг is_visible вычисляется и для постов,"
+        " загруженных командой `loaddata`."
+    )
+    assert client.get("/").context["page_obj"].object_list